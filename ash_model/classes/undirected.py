@@ -1,9 +1,13 @@
+import copy
 import json
-from collections import defaultdict
-from itertools import combinations
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from itertools import chain, islice
 
 import networkx as nx
+import numpy as np
 from halp.undirected_hypergraph import UndirectedHypergraph
+from scipy import sparse
 
 from .node_profile import NProfile
 
@@ -17,25 +21,387 @@ class ASH(object):
 
     def __init__(self, hedge_removal: bool = False) -> None:
         self.H = UndirectedHypergraph()
-        self.time_to_edge = defaultdict(lambda: defaultdict(str))
-        self.snapshots = {}
+        self.time_to_edge = {}
+        self.snapshots = defaultdict(set)
         self.hedge_removal = hedge_removal
+        # node -> {tid: resolved attributes}, invalidated by add_node
+        self._node_profiles = {}
+        # hyperedge id -> number of nodes
+        self._hyperedge_size = {}
+        # hyperedge id -> tuple of its nodes, read without the copy made by get_hyperedge_nodes
+        self._hyperedge_nodes = {}
+        # node -> {hyperedge size: ids of the hyperedges of that size in its star}
+        self._star_by_size = defaultdict(dict)
+        # frozen CSR view of the node stars, rebuilt lazily after updates
+        self._star_csr = None
+        # (start, end) -> ids of the hyperedges in the window, in LRU order
+        self._window_cache = {}
+        # flat arrays of the hyperedge presence spans, rebuilt lazily after updates
+        self._span_arrays = None
+        # (hyperedge span arrays, size of the hyperedge owning each span) of the last query
+        self._span_sizes = None
+        # flat arrays of the node presence spans, rebuilt lazily after updates
+        self._node_span_arrays = None
+        # sorted snapshot ids, refreshed when new snapshots appear (they are never removed)
+        self._snapshot_ids = []
+        # (node span arrays, number of snapshots, active (node, snapshot) pairs) of the last count
+        self._node_snapshot_count = None
+
+    @staticmethod
+    def __merge_intervals(spans: list) -> list:
+        """
+        Merges a list of [start, end] spans in a single sweep: overlapping and adjacent spans are joined.
+
+        :param spans: list of [start, end] spans, in any order
+        :return: sorted list of disjoint, non-adjacent [start, end] spans
+        """
+        spans = sorted(spans)
+        merged = [list(spans[0])]
+        for start, end in spans[1:]:
+            if start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    @staticmethod
+    def __add_span(spans: list, span: list) -> list:
+        """
+        Adds a span to a sorted list of disjoint, non-adjacent spans.
+
+        :param spans: sorted list of disjoint, non-adjacent [start, end] spans
+        :param span: the [start, end] span to be added
+        :return: sorted list of disjoint, non-adjacent [start, end] spans
+        """
+
+        if not spans or span[0] > spans[-1][1] + 1:
+            # the common case of streams: the new span follows all the others
+            return spans + [span]
+
+        # the spans touching [start - 1, end + 1] are contiguous: two binary searches bound them
+        first = bisect_right(spans, [span[0], float("inf")]) - 1
+        if first < 0 or spans[first][1] < span[0] - 1:
+            first += 1
+        last = bisect_right(spans, [span[1] + 1, float("inf")])
+        if first == last:
+            return spans[:first] + [span] + spans[first:]
+        merged = [min(span[0], spans[first][0]), max(span[1], spans[last - 1][1])]
+        return spans[:first] + [merged] + spans[last:]
+
+    @staticmethod
+    def __stab(spans: list, tid: int) -> list:
+        """
+        Binary search for the span covering a snapshot.
+
+        :param spans: sorted list of disjoint [start, end] spans
+        :param tid: snapshot id
+        :return: the [start, end] span containing tid, None if tid is not covered
+        """
+        pos = bisect_right(spans, [tid, float("inf")]) - 1
+        if pos >= 0 and tid <= spans[pos][1]:
+            return spans[pos]
+        return None
 
-    def __recursive_merge(self, inter: list, start_index: int = 0) -> list:
+    @staticmethod
+    def __check_span(start: int, end: int = None) -> None:
         """
+        Validates the appearance and vanishing times of a hyperedge.
 
-        :param inter:
-        :param start_index:
+        :param start: the appearance time
+        :param end: the (optional) vanishing time
         :return:
         """
-        for i in range(start_index, len(inter) - 1):
-            if inter[i][1] > inter[i + 1][0]:
-                new_start = inter[i][0]
-                new_end = inter[i + 1][1]
-                inter[i] = [new_start, new_end]
-                del inter[i + 1]
-                return self.__recursive_merge(inter.copy(), start_index=i)
-        return inter
+
+        if start is None:
+            raise ValueError("The hyperedge appearance time, t, cannot be None")
+        if end is not None and end < start:
+            raise ValueError(
+                "The vanishing time, e, (if present) must be equal or greater than the appearance one."
+            )
+
+    def __stars(self) -> tuple:
+        """
+        Returns a CSR (compressed sparse row) view of the node stars: given i = node_index[node], the star
+        of node is made of the hyperedges with dense ids `indices[indptr[i]:indptr[i + 1]]`, where the dense id
+        of a hyperedge is he_index[hyperedge_id].
+        The view is built lazily and cached until the next node/hyperedge insertion.
+
+        :return: a (node_index, he_index, indptr, indices) tuple
+        """
+
+        if self._star_csr is None:
+            nodes = list(self.H.node_iterator())
+            node_index = {node: i for i, node in enumerate(nodes)}
+            he_index = {he: i for i, he in enumerate(self.H.hyperedge_id_iterator())}
+
+            stars = [self.H.get_star(node) for node in nodes]
+            indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+            np.cumsum([len(star) for star in stars], out=indptr[1:])
+            indices = np.fromiter(
+                (he_index[he] for star in stars for he in star),
+                dtype=np.int64,
+                count=indptr[-1],
+            )
+            self._star_csr = (node_index, he_index, indptr, indices)
+
+        return self._star_csr
+
+    @staticmethod
+    def __flatten_spans(ids: list, spans: list) -> tuple:
+        """
+        Flattens the presence spans of a list of entities into arrays: the k-th span is
+        [lo[k], hi[k]] and belongs to ids[owner[k]]. The spans of an entity are contiguous.
+
+        :param ids: list of entity ids
+        :param spans: list of the span lists of the entities
+        :return: an (ids, owner, lo, hi) tuple
+        """
+
+        owner = np.repeat(np.arange(len(ids)), [len(t) for t in spans])
+        # one contiguous column per bound (not strided views of a (k, 2) block),
+        # so that the masks of the window queries stream through dense memory
+        lo = np.fromiter(
+            (span[0] for t in spans for span in t), dtype=np.int64, count=len(owner)
+        )
+        hi = np.fromiter(
+            (span[1] for t in spans for span in t), dtype=np.int64, count=len(owner)
+        )
+        return ids, owner, lo, hi
+
+    @staticmethod
+    def __run_starts(owner: np.ndarray) -> np.ndarray:
+        """
+        Marks the first span of each entity in (a selection of) flat span arrays: the spans
+        of an entity are contiguous, so no sorting is needed to tell the entities apart.
+
+        :param owner: the entity index of each span, in non-decreasing order
+        :return: a boolean mask over owner
+        """
+
+        starts = np.ones(len(owner), dtype=bool)
+        np.not_equal(owner[1:], owner[:-1], out=starts[1:])
+        return starts
+
+    def __spans(self) -> tuple:
+        """
+        Returns the presence spans of all the hyperedges as flat arrays (see __flatten_spans).
+        The arrays are built lazily and cached until the next hyperedge insertion.
+
+        :return: an (eids, owner, lo, hi) tuple
+        """
+
+        if self._span_arrays is None:
+            eids = list(self.H.hyperedge_id_iterator())
+            self._span_arrays = self.__flatten_spans(
+                eids, [self.H.get_hyperedge_attribute(he, "t") for he in eids]
+            )
+
+        return self._span_arrays
+
+    def __span_sizes(self) -> np.ndarray:
+        """
+        Returns the size of the hyperedge owning each span of __spans.
+        The array is cached along with the span arrays it refers to.
+
+        :return: an array of hyperedge sizes, aligned with the span arrays
+        """
+
+        arrays = self.__spans()
+        if self._span_sizes is None or self._span_sizes[0] is not arrays:
+            eids, owner, _, _ = arrays
+            sizes = np.fromiter(
+                (self._hyperedge_size[he] for he in eids),
+                dtype=np.int64,
+                count=len(eids),
+            )
+            self._span_sizes = (arrays, sizes[owner])
+
+        return self._span_sizes[1]
+
+    def __node_spans(self) -> tuple:
+        """
+        Returns the presence spans of all the nodes as flat arrays (see __flatten_spans).
+        The arrays are built lazily and cached until the next node update.
+
+        :return: a (nodes, owner, lo, hi) tuple
+        """
+
+        if self._node_span_arrays is None:
+            nodes = list(self.H.node_iterator())
+            self._node_span_arrays = self.__flatten_spans(
+                nodes, [self.H.get_node_attribute(n, "t") for n in nodes]
+            )
+
+        return self._node_span_arrays
+
+    def __star_by_size(self, node: int) -> dict:
+        """
+        Returns the star of a node split by hyperedge size, as kept up to date by add_hyperedge.
+        The returned dictionary must not be modified.
+
+        :param node: the node id
+        :return: a size -> set of hyperedge ids dictionary
+        """
+
+        if not self.H.has_node(node):
+            raise ValueError("No such node exists.")
+        return self._star_by_size.get(node, {})
+
+    @staticmethod
+    def __pair_counts(lengths: np.ndarray, flat: np.ndarray, n: int, s: int) -> tuple:
+        """
+        Counts the co-occurrences of the pairs of ids within the rows of a CSR-encoded list of id lists.
+        Only the array operations live here, so that the kernel does not depend on the ASH internals.
+
+        :param lengths: the length of each row
+        :param flat: the concatenated rows, ids in [0, n)
+        :param n: the number of distinct ids
+        :param s: the minimum number of co-occurrences of a pair
+        :return: a (u, v, count) tuple of arrays, with u < v, pairs sorted by first appearance
+        """
+
+        rows = len(lengths)
+        indptr = np.zeros(rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        incidence = sparse.csr_matrix(
+            (np.ones(len(flat), dtype=np.int32), flat, indptr), shape=(rows, n)
+        )
+
+        # the product counts the co-occurrences without listing the pairs of every row:
+        # memory follows the distinct pairs, not the squared row lengths
+        common = sparse.triu(incidence.T @ incidence, k=1, format="coo")
+        keep = common.data >= s
+        us, vs, counts = common.row[keep], common.col[keep], common.data[keep]
+        if len(counts) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+
+        # a pair first appears in the first row holding both its ids: look for the rows of
+        # the id with the shorter column among the (sorted) entries of the other one
+        columns = incidence.tocsc()
+        columns.sort_indices()
+        sizes = np.diff(columns.indptr)
+        owner = np.repeat(np.arange(n, dtype=np.int64), sizes)
+        entries = owner * rows + columns.indices
+
+        short = np.where(sizes[us] <= sizes[vs], us, vs)
+        other = np.where(sizes[us] <= sizes[vs], vs, us)
+        spans = sizes[short]
+        offsets = np.cumsum(spans) - spans
+        candidates = columns.indices[
+            np.repeat(columns.indptr[short] - offsets, spans)
+            + np.arange(int(spans.sum()))
+        ].astype(np.int64)
+        wanted = np.repeat(other, spans) * rows + candidates
+        found = entries[np.minimum(np.searchsorted(entries, wanted), len(entries) - 1)]
+        first = np.minimum.reduceat(
+            np.where(found == wanted, candidates, rows), offsets
+        )
+
+        # within that row pairs come in combinations order: sort by the positions of the ids
+        row_of = np.repeat(np.arange(rows, dtype=np.int64), lengths)
+        slots = row_of * n + flat
+        order = np.argsort(slots, kind="stable")
+        slots = slots[order]
+        pos_u = order[np.searchsorted(slots, first * n + us)]
+        pos_v = order[np.searchsorted(slots, first * n + vs)]
+        ranking = np.lexsort(
+            (np.maximum(pos_u, pos_v), np.minimum(pos_u, pos_v))
+        )
+
+        return (
+            us[ranking].astype(np.int64),
+            vs[ranking].astype(np.int64),
+            counts[ranking].astype(np.int64),
+        )
+
+    @staticmethod
+    def __group_spans(
+        ids: list, owner: np.ndarray, lo: np.ndarray, hi: np.ndarray
+    ) -> list:
+        """
+        Regroups (a selection of) flat span arrays by entity, see __flatten_spans.
+
+        :param ids: list of entity ids
+        :param owner: the entity index of each span, the spans of an entity being contiguous
+        :param lo: the start of each span
+        :param hi: the end of each span
+        :return: a list of (id, list of [start, end] spans) pairs
+        """
+
+        res = []
+        last = None
+        for i, l, h in zip(owner.tolist(), lo.tolist(), hi.tolist()):
+            if i == last:
+                res[-1][1].append([l, h])
+            else:
+                res.append((ids[i], [[l, h]]))
+                last = i
+        return res
+
+    def __bulk_load(self, hyperedges: list, nodes: list) -> list:
+        """
+        Loads hyperedges and nodes whose spans are already merged (sorted, disjoint and non-adjacent)
+        straight into the underlying hypergraph, instead of merging them span by span via add_hyperedge/add_node.
+        The nodes of a hyperedge are present whenever the hyperedge is.
+
+        :param hyperedges: list of (nodes, spans) pairs, for node sets not already in the ASH
+        :param nodes: list of (node, spans, attributes) triples, attributes given as tid-to-value dicts
+        :return: the ids of the loaded hyperedges
+        """
+
+        self._window_cache.clear()
+        self._span_arrays = None
+        self._node_span_arrays = None
+        self._star_csr = None
+
+        presence = defaultdict(list)
+        eids = []
+        for he, spans in hyperedges:
+            for u in he:
+                if not self.H.has_node(u):
+                    self.H.add_node(u)
+
+            # one observation per span, as if added span by span
+            eid = self.H.add_hyperedge(he, {"t": spans, "weight": len(spans)})
+            eids.append(eid)
+            self._hyperedge_size[eid] = len(he)
+            self._hyperedge_nodes[eid] = tuple(he)
+            for u in frozenset(he):
+                self._star_by_size[u].setdefault(len(he), set()).add(eid)
+                presence[u].extend(spans)
+
+            for lo, hi in spans:
+                self.time_to_edge.setdefault(lo, {})[eid] = "+"
+                if self.hedge_removal:
+                    self.time_to_edge.setdefault(hi + 1, {})[eid] = "-"
+                for x in range(lo, hi + 1):
+                    self.snapshots[x].add(eid)
+
+        node_attrs = {}
+        for node, spans, attrs in nodes:
+            presence[node].extend(spans)
+            tids = [i for lo, hi in spans for i in range(lo, hi + 1)]
+            values = {}
+            for key, v in attrs.items():
+                if key != "t":
+                    in_spans = {i: v[i] for i in tids if i in v}
+                    if in_spans:
+                        values[key] = in_spans
+            node_attrs[node] = values
+
+            for lo, hi in spans:
+                for x in (lo, hi):
+                    if x not in self.snapshots:
+                        self.snapshots[x] = set()
+
+        for node, spans in presence.items():
+            attrs = {"t": self.__merge_intervals(spans)}
+            attrs.update(node_attrs.get(node, {}))
+            self.H.add_node(node, attrs)
+            self._node_profiles.pop(node, None)
+
+        return eids
 
     def temporal_snapshots_ids(self) -> list:
         """
@@ -44,7 +410,28 @@ class ASH(object):
 
         :return: list of temporal ids
         """
-        return sorted(self.snapshots.keys())
+        return list(self.__snapshot_ids())
+
+    def __snapshot_ids(self) -> list:
+        """
+        Returns the sorted list of the temporal snapshot ids, inserting the ones that appeared since the last call.
+        The returned list must not be modified.
+
+        :return: sorted list of temporal ids
+        """
+
+        # snapshots are never removed and dicts keep the insertion order:
+        # the new snapshot ids are the last keys
+        fresh = len(self.snapshots) - len(self._snapshot_ids)
+        if fresh > 0:
+            new = sorted(islice(reversed(self.snapshots), fresh))
+            if not self._snapshot_ids or new[0] > self._snapshot_ids[-1]:
+                # the common case of streams: the new snapshots follow all the others
+                self._snapshot_ids.extend(new)
+            else:
+                for tid in new:
+                    insort(self._snapshot_ids, tid)
+        return self._snapshot_ids
 
     def stream_interactions(self) -> list:
         """
@@ -57,9 +444,9 @@ class ASH(object):
         for each interaction in the stream
         """
 
-        keys = sorted(self.time_to_edge.keys())
-        for tid in keys:
-            for he, op in self.time_to_edge[tid].items():
+        # the lookup table already holds the difference between consecutive snapshots
+        for tid, changes in sorted(self.time_to_edge.items()):
+            for he, op in changes.items():
                 yield tid, he, op
 
     ## Nodes
@@ -72,10 +459,35 @@ class ASH(object):
         :return: The average number of nodes in the ASH over all snapshots
         """
 
-        nodes_snapshots = [
-            self.get_number_of_nodes(tid) for tid in self.snapshots.keys()
-        ]
-        return sum(nodes_snapshots) / len(self.snapshots.keys())
+        return self.__node_snapshot_count() / len(self.snapshots)
+
+    def __node_snapshot_count(self) -> int:
+        """
+        Counts the (node, snapshot) pairs such that the node is present in the snapshot, i.e., the
+        sum of each snapshot's nodes. The spans of a node are disjoint, so the snapshots covered by
+        each span are counted with two binary searches over the sorted snapshot ids.
+
+        :return: the number of active (node, snapshot) pairs
+        """
+
+        # the count only changes when the node spans are rebuilt or new snapshots appear
+        arrays = self.__node_spans()
+        cached = self._node_snapshot_count
+        if (
+            cached is not None
+            and cached[0] is arrays
+            and cached[1] == len(self.snapshots)
+        ):
+            return cached[2]
+
+        tids = np.asarray(self.__snapshot_ids(), dtype=np.int64)
+        _, _, lo, hi = arrays
+        covered = np.searchsorted(tids, hi, side="right") - np.searchsorted(
+            tids, lo, side="left"
+        )
+        count = int(covered.sum())
+        self._node_snapshot_count = (arrays, len(self.snapshots), count)
+        return count
 
     def add_node(
         self, node: int, start: int, end: int = None, attr_dict: object = None
@@ -106,56 +518,30 @@ class ASH(object):
             old_attrs = {"t": [start]}
         else:
             old_attrs = self.H.get_node_attributes(node)
-            if "t" in old_attrs:
-                old_attrs["t"].append(start)
-            else:
-                old_attrs["t"] = [start]
-
-        head = None
-        for i in range(start[0], start[1] + 1):
-            if attr_dict is None:
-                continue
-            for key, v in attr_dict.items():
-                if key in old_attrs and key != "t":
-                    if head is not None:
-                        old_attrs[key][i] = head
-                    else:
-                        old_attrs[key][i] = v
-                else:
-                    old_attrs[key] = {i: v}
-                    head = f"t_{i}"
-
-        # compacting intervals
-        intervals = []
-        presence = sorted(old_attrs["t"])
-        for i, span in enumerate(presence):
-            if i < len(presence) - 1:
-                if span[1] == presence[i + 1][0] - 1:
-                    intervals.append([span[0], presence[i + 1][1]])
-                else:
-                    intervals.append(span)
-            else:
-                intervals.append(span)
-
-        merged = self.__recursive_merge(intervals.copy())
-
-        # contiguity
-        cont = [merged[0]]
-        pos = 0
-        for i in range(1, len(merged)):
-            if cont[pos][1] == merged[i][0]:
-                cont[pos][1] = merged[i][1]
-            else:
-                pos += 1
-                cont.append(merged[i])
-
-        old_attrs["t"] = cont
+            old_attrs["t"] = self.__add_span(old_attrs.get("t", []), start)
+
+        # read the attributes once instead of at every timestep of the span.
+        # Presence is given by start/end: a "t" entry (e.g., when attr_dict is the
+        # profile of a node of another ASH) must not overwrite the node spans
+        items = (
+            [(key, v) for key, v in attr_dict.items() if key != "t"]
+            if attr_dict
+            else []
+        )
+        if items:
+            # every timestep of the span refers to the value itself (no copies are made)
+            tids = range(start[0], start[1] + 1)
+            for key, v in items:
+                old_attrs.setdefault(key, {}).update(dict.fromkeys(tids, v))
 
         self.H.add_node(node, old_attrs)
+        self._node_profiles.pop(node, None)
+        self._node_span_arrays = None
+        self._star_csr = None
         if start[0] not in self.snapshots:
-            self.snapshots[start[0]] = []
+            self.snapshots[start[0]] = set()
         if end is not None and end not in self.snapshots:
-            self.snapshots[end] = []
+            self.snapshots[end] = set()
 
     def add_nodes(
         self, nodes: list, start: int, end: int = None, node_attr_dict: dict = None
@@ -171,40 +557,58 @@ class ASH(object):
         :return: None
         """
 
+        span = [start, start if end is None else end]
+        fresh = False
         for node in nodes:
-            attr = None if node not in node_attr_dict else node_attr_dict[node]
-            self.add_node(node, start, end, attr)
+            attr = None if node_attr_dict is None else node_attr_dict.get(node)
+            if attr or self.H.has_node(node):
+                self.add_node(node, start, end, attr)
+            else:
+                # first appearance without attributes: no spans to merge
+                self.H.add_node(node, {"t": [list(span)]})
+                fresh = True
+
+        if fresh:
+            self._node_span_arrays = None
+            self._star_csr = None
+            for x in span:
+                if x not in self.snapshots:
+                    self.snapshots[x] = set()
 
     def get_node_profile(self, node: int, tid: int = None) -> NProfile:
         """
         The get_node_profile function returns a copy of the NProfile object associated with the given node.
         The optional parameter tid specifies the temporal snapshot the profile refers to.
+        Resolved profiles are cached per (node, tid) and invalidated whenever the node is updated.
 
         :param node: Specify the node to get the profile of
         :param tid: Get the profile of a node at a specific time
         :return: A NProfile object
         """
 
+        profiles = self._node_profiles.get(node)
+        if profiles is None or tid not in profiles:
+            attrs = self.__resolve_node_attributes(node, tid)
+            self._node_profiles.setdefault(node, {})[tid] = attrs
+        else:
+            attrs = profiles[tid]
+
+        return NProfile(node, **{key: copy.copy(v) for key, v in attrs.items()})
+
+    def __resolve_node_attributes(self, node: int, tid: int = None) -> dict:
+        """
+        Reads the attributes of a node from the underlying hypergraph.
+
+        :param node: the node id
+        :param tid: optional temporal snapshot id
+        :return: a dict of attributes (tid-to-value dicts if tid is None, plain values otherwise)
+        """
+
+        attrs = self.H.get_node_attributes(node)
         if tid is None:
-            attrs = self.H.get_node_attributes(node)
-            for key, l in attrs.items():
-                if key != "t":
-                    for tid, value in l.items():
-                        if isinstance(value, str) and "t_" in value:
-                            base_tid = int(value[2:])
-                            attrs[key][tid] = l[base_tid]
+            return attrs
 
-            return NProfile(node, **attrs)
-        else:
-            res = {}
-            attrs = self.H.get_node_attributes(node)
-            for key, l in attrs.items():
-                if key != "t" and tid in l:
-                    res[key] = l[tid]
-                    if isinstance(l[tid], str) and "t_" in l[tid]:
-                        base_tid = int(l[tid][2:])
-                        res[key] = l[base_tid]
-        return NProfile(node, **res)
+        return {key: l[tid] for key, l in attrs.items() if key != "t" and tid in l}
 
     def get_node_attribute(self, node: int, attr_name: str, tid: int = None) -> object:
         """
@@ -223,23 +627,13 @@ class ASH(object):
             attrs = self.H.get_node_attribute(node, attr_name)
             if attr_name == "t":
                 return {"t": attrs}
-            for tid, value in attrs.items():
-                if "t_" in value:
-                    base_tid = int(value[2:])
-                    attrs[tid] = attrs[base_tid]
             return attrs
 
         else:
             attrs = self.H.get_node_attribute(node, attr_name)
             if attr_name == "t":
-                for spans in attrs:
-                    for span in spans:
-                        if span[0] <= tid <= span[1] + 1:
-                            return {"t": [attrs]}
-                return {"t": []}
-            value = attrs[tid]
-            if isinstance(value, str) and "t_" in value:
-                return attrs[int(value[2:])]
+                span = self.__stab(attrs, tid)
+                return {"t": [span] if span is not None else []}
             return attrs[tid]
 
     def node_attributes_to_attribute_values(
@@ -257,20 +651,23 @@ class ASH(object):
         :return: A dictionary of attribute names and the values they can take
         """
 
+        # the attributes are read straight from their tid-to-value columns:
+        # no profile is built (nor cached) for every node
         attributes = defaultdict(set)
         for n in self.get_node_set(tid=tid):
-            for name, vals in self.get_node_profile(n, tid=tid).items():
-                if name != "t":
-                    if tid is None:
-                        for value in vals.values():
-                            attributes[name].add(value)
-                    else:
-                        attributes[name].add(vals)
+            for name, values in self.H.get_node_attributes(n).items():
+                if name == "t":
+                    continue
+                if tid is None:
+                    if values:
+                        attributes[name].update(values.values())
+                elif tid in values:
+                    attributes[name].add(values[tid])
         if categorical:
             numerical = [
                 attribute
                 for attribute in attributes
-                if not isinstance(list(attributes[attribute])[0], str)
+                if not isinstance(next(iter(attributes[attribute])), str)
             ]
             for attribute in numerical:
                 del attributes[attribute]
@@ -289,7 +686,9 @@ class ASH(object):
         if tid is None:
             return self.H.get_node_set()
         else:
-            return {n for n in self.H.get_node_set() if self.has_node(n, tid)}
+            # vectorised stabbing query over all the node spans at once
+            nodes, owner, lo, hi = self.__node_spans()
+            return {nodes[i] for i in owner[(lo <= tid) & (tid <= hi)]}
 
     def get_number_of_nodes(self, tid: int = None) -> int:
         """
@@ -304,7 +703,9 @@ class ASH(object):
         if tid is None:
             return len(self.get_node_set())
         else:
-            return len(self.get_node_set(tid))
+            # the spans of a node are disjoint: at most one of them covers tid
+            _, _, lo, hi = self.__node_spans()
+            return int(np.count_nonzero((lo <= tid) & (tid <= hi)))
 
     def get_star(self, node: int, hyperedge_size: int = None, tid: int = None) -> set:
         """
@@ -319,30 +720,16 @@ class ASH(object):
         :return: The set of hyperedge ids that include a given node
         """
 
-        if tid is None:
-            eids = self.H.get_star(node)
-            if hyperedge_size is None:
-                return eids
-            else:
-                return {
-                    eid
-                    for eid in eids
-                    if len(self.get_hyperedge_nodes(eid)) == hyperedge_size
-                }
+        if hyperedge_size is None:
+            star = self.H.get_star(node)
         else:
-            if hyperedge_size is None:
-                return {
-                    eid
-                    for eid in self.H.get_star(node)
-                    if self.has_hyperedge_id(eid, tid)
-                }
-            else:
-                return {
-                    eid
-                    for eid in self.H.get_star(node)
-                    if self.has_hyperedge_id(eid, tid)
-                    and len(self.get_hyperedge_nodes(eid)) == hyperedge_size
-                }
+            star = self.__star_by_size(node).get(hyperedge_size, set())
+
+        if tid is None:
+            return star if hyperedge_size is None else set(star)
+        # the snapshots index the hyperedges active in each tid: intersecting the
+        # two sets only walks the smaller one
+        return star & self.snapshots.get(tid, set())
 
     def get_number_of_neighbors(
         self, node: int, hyperedge_size: int = None, tid: int = None
@@ -358,8 +745,7 @@ class ASH(object):
         :param tid:: Specify the temporal snapshot
         :return: The number of neighbors for a given node
         """
-        neighbors = self.get_neighbors(node, hyperedge_size, tid)
-        return len(neighbors)
+        return len(self.get_neighbors(node, hyperedge_size, tid))
 
     def get_neighbors(
         self, node: int, hyperedge_size: int = None, tid: int = None
@@ -376,18 +762,10 @@ class ASH(object):
         :return: The set of neighbors of a given node
         """
 
-        star = self.get_star(node, tid=tid)
-        res = []
-        if hyperedge_size is not None:
-            for s in star:
-                nodes = self.get_hyperedge_nodes(s)
-                if len(nodes) == hyperedge_size:
-                    res.extend(nodes)
-        else:
-            for s in star:
-                nodes = self.get_hyperedge_nodes(s)
-                res.extend(nodes)
-        res = set(res)
+        res = set()
+        nodes_of = self._hyperedge_nodes
+        for s in self.get_star(node, hyperedge_size=hyperedge_size, tid=tid):
+            res.update(nodes_of[s])
         res.discard(node)
         return res
 
@@ -402,17 +780,8 @@ class ASH(object):
         :param tid: Get the degree at a specific point in time
         :return: The degree of a node
         """
-        star = self.get_star(node, tid=tid)
-
-        if hyperedge_size is not None:
-            res = 0
-            for s in star:
-                nodes = self.get_hyperedge_nodes(s)
-                if len(nodes) == hyperedge_size:
-                    res += 1
-            return res
-        else:
-            return len(star)
+        # the size index narrows the star before any presence check
+        return len(self.get_star(node, hyperedge_size=hyperedge_size, tid=tid))
 
     def get_degree_by_hyperedge_size(self, node: int, tid: int = None) -> dict:
         """
@@ -427,12 +796,13 @@ class ASH(object):
         :return: A dictionary where the keys are the node's star's hyperedge sizes and the values are their frequencies
         """
 
-        distr = defaultdict(int)
-        star = self.get_star(node, tid=tid)
-        for s in star:
-            nodes = self.get_hyperedge_nodes(s)
-            distr[len(nodes)] += 1
-        return distr
+        if tid is None:
+            return Counter(
+                {size: len(eids) for size, eids in self.__star_by_size(node).items()}
+            )
+
+        sizes = self._hyperedge_size
+        return Counter(sizes[s] for s in self.get_star(node, tid=tid))
 
     def get_s_degree(self, node: int, s: int, tid: int = None) -> int:
         """
@@ -446,11 +816,7 @@ class ASH(object):
         """
 
         degs = self.get_degree_by_hyperedge_size(node, tid)
-        res = 0
-        for k, v in degs.items():
-            if k >= s:
-                res += v
-        return res
+        return sum(v for k, v in degs.items() if k >= s)
 
     def has_node(self, node: int, tid: int = None) -> bool:
         """
@@ -464,15 +830,9 @@ class ASH(object):
 
         presence = self.H.has_node(node)
         if presence and tid is not None:
-            attrs = self.get_node_profile(node)
-            if isinstance(attrs, NProfile):
-                attrs = attrs.get_attribute("t")
-            else:
-                attrs = attrs["t"]
-            for span in attrs:
-                if span[0] <= tid <= span[1]:
-                    return True
-            return False
+            # only the presence spans are needed: skip the full profile resolution
+            attrs = self.H.get_node_attribute(node, "t")
+            return self.__stab(attrs, tid) is not None
         return presence
 
     def node_iterator(self, tid: int = None) -> list:
@@ -487,8 +847,19 @@ class ASH(object):
 
         if tid is None:
             return self.H.node_iterator()
-        S, _ = self.hypergraph_temporal_slice(tid)
-        return S.H.node_iterator()
+
+        # the nodes of hypergraph_temporal_slice(tid), in the same order, without building it:
+        # the nodes of its hyperedges first, then the ones present in tid on their own
+        nodes = dict.fromkeys(
+            node
+            for he in self.hyperedge_id_iterator(start=tid)
+            for node in self._hyperedge_nodes[he]
+        )
+        node_ids, owner, lo, hi = self.__node_spans()
+        nodes.update(
+            dict.fromkeys(node_ids[i] for i in owner[(lo <= tid) & (tid <= hi)])
+        )
+        return iter(nodes)
 
     def get_node_presence(self, node: int) -> list:
         """
@@ -499,13 +870,9 @@ class ASH(object):
         :return: A list of all the snapshots that a node is present in
         """
 
-        snaps = []
-        tids = self.get_node_attribute(node, "t")
-        for spans in tids.values():
-            for span in spans:
-                snaps.extend(range(span[0], span[1] + 1))
-        snaps = sorted(list(set(snaps)))
-        return snaps
+        # the spans are sorted and disjoint: their timesteps, in order, need no deduplication
+        spans = self.H.get_node_attribute(node, "t")
+        return list(chain.from_iterable(range(lo, hi + 1) for lo, hi in spans))
 
     def coverage(self) -> float:
         """
@@ -518,9 +885,7 @@ class ASH(object):
 
         T = len(self.snapshots)
         V = self.get_number_of_nodes()
-        W = 0
-        for tid in self.snapshots:
-            W += self.get_number_of_nodes(tid)
+        W = self.__node_snapshot_count()
 
         return W / (T * V)
 
@@ -534,8 +899,14 @@ class ASH(object):
         """
 
         ucov = 0
-        for tid in self.snapshots:
-            ucov += 1 if self.has_node(node, tid) else 0
+        if self.H.has_node(node):
+            # count the snapshots falling in the (disjoint) node spans
+            # instead of probing each of them
+            spans = self.H.get_node_attribute(node, "t")
+            tids = self.__snapshot_ids()
+            ucov = sum(
+                bisect_right(tids, hi) - bisect_left(tids, lo) for lo, hi in spans
+            )
         return ucov / len(self.snapshots)
 
     def node_degree_distribution(self, start: int = None, end: int = None) -> dict:
@@ -551,26 +922,50 @@ class ASH(object):
         :param end: Ending point of optional time window
         :return: A degree-to-frequency dictionary.
         """
-        dist = defaultdict(int)
-
         if start is None:
-            for node in self.node_iterator():
-                dist[self.get_degree(node)] += 1
-
-        elif start is not None and end is None:
-            for node in self.node_iterator(tid=start):
-                dist[self.get_degree(node, tid=start)] += 1
+            # the degree of a node is the length of its star row
+            degrees = np.diff(self.__stars()[2])
 
         else:
-            S, old_to_new = self.hypergraph_temporal_slice(start=start, end=end)
-            for node in S.node_iterator():
-                dist[S.get_degree(node)] += 1
+            # the nodes the temporal slice would retain: the ones of its hyperedges
+            # and the ones present in the window on their own
+            # (node spans and stars follow the node order of the ASH)
+            _, owner, lo, hi = self.__node_spans()
+            if end is None:
+                # degrees at start, the slice keeping every hyperedge alive from start on
+                degrees = self.__degrees_in(self.__window(start, start)[0])
+                kept = self.__degrees_in(self.__window(start)[0]) > 0
+                kept[owner[(lo <= start) & (start <= hi)]] = True
+            else:
+                degrees = self.__degrees_in(self.__window(start, end)[0])
+                kept = degrees > 0
+                kept[owner[(lo <= end) & (hi >= start)]] = True
+            degrees = degrees[kept]
+
+        # one histogram pass over the degrees, whatever the branch
+        histogram = np.bincount(degrees)
+        found = np.flatnonzero(histogram)
+        return Counter(dict(zip(found.tolist(), histogram[found].tolist())))
 
-        return dist
+    def __degrees_in(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Counts, for every node, the hyperedges of its star found at the given positions
+        (see __window), in a single pass over the star CSR.
+
+        :param positions: the dense ids of the hyperedges to count
+        :return: an array of degrees, in the node order of __stars
+        """
+
+        _, he_index, indptr, indices = self.__stars()
+        selected = np.zeros(len(he_index), dtype=np.int64)
+        selected[positions] = 1
+        running = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(selected[indices], out=running[1:])
+        return running[indptr[1:]] - running[indptr[:-1]]
 
     ## Hyperedges
 
-    def add_hyperedge(self, nodes: list, start: int, end: int = None, **attrs) -> None:
+    def add_hyperedge(self, nodes: list, start: int, end: int = None, **attrs) -> str:
         """
         The add_hyperedge function adds a hyperedge to the ASH, active between :start: and :end:.
         If the :end: parameter is not specified, it defaults to :start:
@@ -579,84 +974,88 @@ class ASH(object):
         :param start: Indicate the appearance time of the hyperedge
         :param end: Indicate the vanishing time of the hyperedge
         :param **attrs: Pass additional information about the interaction
-        :return:
+        :return: The id of the (new or updated) hyperedge
         """
-        if start is None:
-            raise ValueError("The hyperedge appearance time, t, cannot be None")
-        if end is not None and end < start:
-            raise ValueError(
-                "The vanishing time, e, (if present) must be equal or greater than the appearance one."
-            )
+        self.__check_span(start, end)
 
-        for u in nodes:
-            if not self.H.has_node(u):
-                self.add_node(u, start, end, {})
+        # nodes seen for the first time carry no attributes: take the add_nodes fast path
+        new_nodes = [u for u in dict.fromkeys(nodes) if not self.H.has_node(u)]
+        if new_nodes:
+            self.add_nodes(new_nodes, start, end)
 
-        if end is None:
-            start = [start, start]
-        else:
-            start = [start, end]
+        self._window_cache.clear()
+        self._span_arrays = None
+
+        # hashed once: halp reuses a frozenset as is in all its node set lookups
+        return self.__add_hyperedge(
+            nodes, frozenset(nodes), [start, start if end is None else end], attrs
+        )
+
+    def __add_hyperedge(
+        self, nodes: list, frozen: frozenset, start: list, attrs: dict
+    ) -> str:
+        """
+        Adds (or updates) a hyperedge whose span is already checked and whose nodes are already in the ASH.
+        The caller is in charge of invalidating the caches.
+
+        :param nodes: the nodes of the hyperedge
+        :param frozen: the frozenset of the nodes
+        :param start: the [start, end] span of the interaction
+        :param attrs: the attributes of a new hyperedge
+        :return: The id of the (new or updated) hyperedge
+        """
 
         # add the interaction
-        if not self.H.has_hyperedge(nodes):  # new hyperedge
+        if not self.H.has_hyperedge(frozen):  # new hyperedge
             presence = {"t": [start]}  # : attr_dict}}
             for k, v in attrs.items():
                 presence[k] = v
 
-            self.H.add_hyperedge(nodes, attr_dict=presence)
+            eid = self.H.add_hyperedge(nodes, attr_dict=presence)
+            self._hyperedge_size[eid] = len(nodes)
+            self._hyperedge_nodes[eid] = tuple(nodes)
+            for u in frozen:
+                self._star_by_size[u].setdefault(len(nodes), set()).add(eid)
+            self._star_csr = None
+            intervals = fresh = presence["t"]
+            stale = []
 
         else:  # update existing one
-            eid = self.H.get_hyperedge_id(nodes)
-            old_attr = self.H.get_hyperedge_attributes(eid)
-            presence = old_attr["t"]
-            presence.append(start)
-            presence = sorted(presence)
-
-            # compacting intervals
-            intervals = []
-            for i, span in enumerate(presence):
-                if i < len(presence) - 1:
-                    if span[1] == presence[i + 1][0] - 1:
-                        intervals.append([span[0], presence[i + 1][1]])
-                    else:
-                        intervals.append(span)
-                else:
-                    intervals.append(span)
+            eid = self.H.get_hyperedge_id(frozen)
+            # a copy of the stored spans, that can be extended in place
+            presence = self.H.get_hyperedge_attribute(eid, "t")
+            if start[0] > presence[-1][1] + 1:
+                # the common case of streams: a trailing span leaves the previous ones,
+                # and their lookup table entries, untouched
+                presence.append(start)
+                intervals = presence
+                fresh = [start]
+                stale = []
+            else:
+                # the only lookup table entries of eid sit on the bounds of its previous spans
+                stale = [(span[0], span[1]) for span in presence]
+                intervals = fresh = self.__merge_intervals(presence + [start])
 
-            merged = self.__recursive_merge(intervals.copy())
+            # only the presence and the weight (one more observation) change
+            self.H.add_hyperedge(
+                frozen, t=intervals, weight=self.H.get_hyperedge_weight(eid) + 1
+            )
 
-            # contiguity
-            cont = [merged[0]]
-            pos = 0
-            for i in range(1, len(merged)):
-                if cont[pos][1] == merged[i][0]:
-                    cont[pos][1] = merged[i][1]
-                else:
-                    pos += 1
-                    cont.append(merged[i])
-
-            old_attr["t"] = cont
-
-            old_attr["weight"] = len(merged)
-            self.H.add_hyperedge(nodes, old_attr)
-
-        # lookup table (to do)
-        eid = self.H.get_hyperedge_id(nodes)
-        intervals = self.H.get_hyperedge_attributes(eid)["t"]
-        for span in intervals:
-            for i in range(span[0], span[1] + 1):
-                if eid in self.time_to_edge[i]:
-                    del self.time_to_edge[i][eid]
-            self.time_to_edge[span[0]][eid] = "+"
+        # lookup table: drop the stale bounds instead of scanning every covered snapshot
+        for lo, hi in stale:
+            self.time_to_edge.get(lo, {}).pop(eid, None)
             if self.hedge_removal:
-                self.time_to_edge[span[1] + 1][eid] = "-"
+                self.time_to_edge.get(hi + 1, {}).pop(eid, None)
+
+        for span in fresh:
+            self.time_to_edge.setdefault(span[0], {})[eid] = "+"
+            if self.hedge_removal:
+                self.time_to_edge.setdefault(span[1] + 1, {})[eid] = "-"
 
         for x in range(start[0], start[1] + 1):
-            if x not in self.snapshots:
-                self.snapshots[x] = [eid]
-            else:
-                self.snapshots[x].append(eid)
-                self.snapshots[x] = list(set(self.snapshots[x]))
+            self.snapshots[x].add(eid)
+
+        return eid
 
     def add_hyperedges(self, hyperedges: list, start: int, end: int = None) -> None:
         """
@@ -669,8 +1068,21 @@ class ASH(object):
         :return:
         """
 
+        self.__check_span(start, end)
+
+        # the new nodes of the whole batch are added at once, in order of appearance
+        new_nodes = dict.fromkeys(
+            u for nodes in hyperedges for u in nodes if not self.H.has_node(u)
+        )
+        self.add_nodes(list(new_nodes), start, end)
+
+        self._window_cache.clear()
+        self._span_arrays = None
+
+        span = [start, start if end is None else end]
         for nodes in hyperedges:
-            self.add_hyperedge(nodes, start, end)
+            # each hyperedge gets its own copy of the span, that may be extended in place
+            self.__add_hyperedge(nodes, frozenset(nodes), list(span), {})
 
     def get_hyperedge_attribute(
         self, hyperedge_id: str, attribute_name: str, tid: int = None
@@ -681,27 +1093,15 @@ class ASH(object):
         :param hyperedge_id:str: Specify the hyperedge to get the attribute of
         :param attribute_name: Specify the attribute that is to be returned
         :param tid: Specify a time slot
-        :return: The attribute of a hyperedge
+        :return: The attribute of a hyperedge (for "t", the span covering tid if tid is specified)
         """
 
-        # to check against attributes (not implemented)
-        attrs = self.H.get_hyperedge_attribute(hyperedge_id, attribute_name)
+        attr = self.H.get_hyperedge_attribute(hyperedge_id, attribute_name)
 
         if tid is not None:
-            res = {}
-            for key, v in attrs.items():
-                if key != "t" and key == attribute_name:
-                    res[key] = v
-                else:
-                    for span in v:
-                        if span[0] <= tid <= span[1]:
-                            res["t"] = [span]
-            if "t" in res:
-                return res
-            else:
-                raise ValueError("Hyperedge not present in the selected timeslot")
-        else:
-            return attrs
+            # same restriction to the time slot as get_hyperedge_attributes
+            return self.get_hyperedge_attributes(hyperedge_id, tid)[attribute_name]
+        return attr
 
     def get_hyperedge_attributes(self, hyperedge_id: str, tid: int = None) -> dict:
         """
@@ -720,9 +1120,9 @@ class ASH(object):
                 if key != "t":
                     res[key] = v
                 else:
-                    for span in v:
-                        if span[0] <= tid <= span[1]:
-                            res["t"] = [span]
+                    span = self.__stab(v, tid)
+                    if span is not None:
+                        res["t"] = [span]
             if "t" in res:
                 return res
             else:
@@ -759,23 +1159,30 @@ class ASH(object):
             else:
                 return {
                     he
-                    for he in self.H.get_hyperedge_id_set()
-                    if len(self.get_hyperedge_nodes(he)) == hyperedge_size
+                    for he, size in self._hyperedge_size.items()
+                    if size == hyperedge_size
                 }
         else:
-            hedges = {}
-            for i in range(min(self.time_to_edge.keys()), tid + 1):
-                hest = self.time_to_edge[i]
-                for key, v in hest.items():
-                    if v == "+" and (
-                        hyperedge_size is None
-                        or len(self.get_hyperedge_nodes(key)) == hyperedge_size
-                    ):
-                        hedges[key] = None
-                    else:
-                        if key in hedges:
-                            del hedges[key]
-            return set(hedges.keys())
+            eids, owner, _, _ = self.__spans()
+            alive = self.__alive_at(tid)
+            if hyperedge_size is not None:
+                alive &= self.__span_sizes() == hyperedge_size
+            return {eids[i] for i in owner[alive]}
+
+    def __alive_at(self, tid: int) -> np.ndarray:
+        """
+        Vectorised stabbing query over all the hyperedge spans at once (see __spans);
+        without removal a hyperedge stays alive after its first appearance.
+
+        :param tid: snapshot id
+        :return: a boolean mask over the hyperedge spans
+        """
+
+        _, _, lo, hi = self.__spans()
+        alive = lo <= tid
+        if self.hedge_removal:
+            alive &= tid <= hi
+        return alive
 
     def get_hyperedge_nodes(self, hyperedge_id: str) -> list:
         """
@@ -808,11 +1215,13 @@ class ASH(object):
         :return: True if the hyperedge with the given nodes exists, False otherwise
         """
 
-        presence = self.H.has_hyperedge(nodes)
-        if presence and tid is not None:
-            eid = self.get_hyperedge_id(nodes)
-            return self.has_hyperedge_id(eid, tid)
-        return presence
+        frozen = frozenset(nodes)
+        if not self.H.has_hyperedge(frozen):
+            return False
+        if tid is None:
+            return True
+        # the id is known to exist: only its presence in the snapshot is left to check
+        return self.H.get_hyperedge_id(frozen) in self.snapshots.get(tid, ())
 
     def has_hyperedge_id(self, hyperedge_id: str, tid: int = None) -> bool:
         """
@@ -826,13 +1235,27 @@ class ASH(object):
 
         presence = self.H.has_hyperedge_id(hyperedge_id)
         if presence and tid is not None:
-            attrs = self.get_hyperedge_attributes(hyperedge_id)["t"]
-            for span in attrs:
-                if span[0] <= tid <= span[1]:
-                    return True
-            return False
+            return hyperedge_id in self.snapshots.get(tid, ())
         return presence
 
+    def __window_mask(self, start: int, end: int = None) -> np.ndarray:
+        """
+        Selects the hyperedge spans (see __spans) falling in a time window, as in hypergraph_temporal_slice.
+        Without an end, the spans ending at or after start are selected, provided that start is a snapshot.
+
+        :param start: the start of the window
+        :param end: the (optional) end of the window
+        :return: a boolean mask over the hyperedge spans
+        """
+
+        _, _, lo, hi = self.__spans()
+        if end is None:
+            keep = hi >= start
+            if start not in self.snapshots:
+                keep[:] = False
+            return keep
+        return (lo <= end) & (hi >= start)
+
     def hyperedge_id_iterator(self, start: int = None, end: int = None) -> list:
         """
         The hyperedge_id_iterator function returns a list of hyperedge IDs that are present in the ASH
@@ -845,11 +1268,54 @@ class ASH(object):
 
         if start is None:
             return self.H.hyperedge_id_iterator()
-        S, eid_to_new_eid = self.hypergraph_temporal_slice(start, end)
-        new_eid_to_old_eid = {v: k for k, v in eid_to_new_eid.items()}
 
-        edges = list(S.H.hyperedge_id_iterator())
-        return [new_eid_to_old_eid[e] for e in edges]
+        return list(self.__window(start, end)[1])
+
+    def __window(self, start: int, end: int = None) -> tuple:
+        """
+        Returns the hyperedges falling in a time window, both as positions in the hyperedge order
+        of the ASH (the rows of __spans, the dense ids of __stars) and as ids.
+
+        :param start: the start of the window
+        :param end: the (optional) end of the window
+        :return: a (positions, ids) tuple, in the hyperedge order of the ASH
+        """
+
+        # the same windows are projected over and over by the s-measures: keep the last ones
+        key = (start, end)
+        if key in self._window_cache:
+            window = self._window_cache.pop(key)
+        else:
+            # same hyperedges, in the same order, as the temporal slice, without building it:
+            # the spans of a hyperedge are contiguous and the owners follow the insertion order
+            eids, owner, _, _ = self.__spans()
+            selected = owner[self.__window_mask(start, end)]
+            positions = selected[self.__run_starts(selected)]
+            window = (positions, tuple(eids[i] for i in positions.tolist()))
+            if len(self._window_cache) >= 64:
+                del self._window_cache[next(iter(self._window_cache))]
+        self._window_cache[key] = window
+
+        return window
+
+    def __in_window(
+        self, positions: np.ndarray, start: int, end: int = None
+    ) -> np.ndarray:
+        """
+        Tells which hyperedges, given by their positions (see __window), fall in a time window.
+        The window positions are sorted: each lookup is a binary search.
+
+        :param positions: the dense ids of the hyperedges to check
+        :param start: the start of the window
+        :param end: the (optional) end of the window
+        :return: a boolean mask over positions
+        """
+
+        window = self.__window(start, end)[0]
+        pos = np.searchsorted(window, positions)
+        inside = pos < len(window)
+        inside[inside] = window[pos[inside]] == positions[inside]
+        return inside
 
     def get_size(self, tid: int = None) -> int:
         """
@@ -860,7 +1326,11 @@ class ASH(object):
         :return: The number of hyperedges in the ASH
         """
 
-        return len(self.get_hyperedge_id_set(tid=tid))
+        if tid is None:
+            return len(self.get_hyperedge_id_set())
+        # counted on the spans, without collecting the ids
+        _, owner, _, _ = self.__spans()
+        return int(np.count_nonzero(self.__run_starts(owner[self.__alive_at(tid)])))
 
     def get_avg_number_of_hyperedges(self) -> float:
         """
@@ -870,7 +1340,7 @@ class ASH(object):
         :return: The average number of hyperedges per snapshot
         """
 
-        return sum([len(he) for he in self.snapshots.values()]) / len(self.snapshots)
+        return sum(map(len, self.snapshots.values())) / len(self.snapshots)
 
     def hyperedge_contribution(self, hyperedge_id: str) -> float:
         """
@@ -881,10 +1351,9 @@ class ASH(object):
         :return: The contribution of a hyperedge
         """
 
-        attrs = self.get_hyperedge_attributes(hyperedge_id)["t"]
-        count = 0
-        for span in attrs:
-            count += len(range(span[0], span[1] + 1))
+        # every timestep in a hyperedge span is a snapshot: no need to check them one by one
+        attrs = self.H.get_hyperedge_attribute(hyperedge_id, "t")
+        count = sum(span[1] - span[0] + 1 for span in attrs)
         return count / len(self.snapshots)
 
     # Slices
@@ -894,96 +1363,42 @@ class ASH(object):
         The hypergraph_temporal_slice constructs a new ASH instance that contains hyperedges active in the given
         time window. It returns both the new instance and a dictionary mapping old hyperedge ids to new hyperedge ids.
         If no end time is specified, then all temporal ids greater or equal to start are considered.
+        Within a window, the presence of hyperedges and nodes is restricted to the window itself.
 
         :param start: Specify the start time of the temporal slice
         :param end: Specify the end of the temporal slice
         :return: an ASH instance and a dictionary mapping old hyperedge ids to new hyperedge ids
         """
 
-        if end is None and start in self.snapshots:
-            edges = set(
-                [
-                    e1
-                    for obs in range(min(self.snapshots), max(self.snapshots) + 1)
-                    for e1 in self.snapshots.get(obs, [])
-                ]
-            )
-
-        elif end is None and start not in self.snapshots:
-            edges = []
+        # clip all the hyperedge and node spans to the window at once,
+        # then load them in a single pass
+        eids, owner, lo, hi = self.__spans()
+        keep = self.__window_mask(start, end)
+        if end is None:
+            los, his = lo[keep], hi[keep]
         else:
-            edges = set(
-                [
-                    e1
-                    for obs in range(min(self.snapshots), end + 1)
-                    for e1 in self.snapshots.get(obs, [])
-                ]
-            )
-
-        S = ASH()
-        eid_to_new_eid = {}
-        for e1 in edges:
-            he = self.get_hyperedge_nodes(e1)
-            e_attrs = self.get_hyperedge_attributes(e1)
-            t1 = e_attrs["t"]
-
-            for span in t1:
-                if end is not None:
-                    if span[0] >= start and span[1] <= end:
-                        S.add_hyperedge(he, span[0], span[1])
-                        new_eid = S.get_hyperedge_id(he)
-                        eid_to_new_eid[e1] = new_eid
-
-                    elif end >= span[0] >= start and span[1] >= end:
-                        S.add_hyperedge(he, start=span[0], end=end)
-                        new_eid = S.get_hyperedge_id(he)
-                        eid_to_new_eid[e1] = new_eid
-
-                    elif span[0] < start and span[1] >= end:
-                        S.add_hyperedge(he, start, span[1])
-                        new_eid = S.get_hyperedge_id(he)
-                        eid_to_new_eid[e1] = new_eid
-
-                    # else:
-                    #    S.add_hyperedge(he, start, end)
-                    #    new_eid = S.get_hyperedge_id(he)
-                    #    eid_to_new_eid[e1] = new_eid
+            los, his = np.maximum(lo[keep], start), np.minimum(hi[keep], end)
 
-                else:
-                    if span[0] >= start or start <= span[1]:
-                        if span[0] != span[1]:
-                            S.add_hyperedge(he, span[0], span[1])
-                            new_eid = S.get_hyperedge_id(he)
-                            eid_to_new_eid[e1] = new_eid
-
-                        else:
-                            S.add_hyperedge(he, span[0])
-                            new_eid = S.get_hyperedge_id(he)
-                            eid_to_new_eid[e1] = new_eid
-
-        for n in self.get_node_set():
-            attrs = self.get_node_profile(n)
-            if not isinstance(attrs, NProfile):
-                t1 = attrs["t"]
-            else:
-                t1 = attrs.get_attribute("t")
+        hyperedges, old_eids = [], []
+        for eid, spans in self.__group_spans(eids, owner[keep], los, his):
+            hyperedges.append((self.get_hyperedge_nodes(eid), spans))
+            old_eids.append(eid)
 
-            for span in t1:
-                if end is not None:
-                    if span[0] >= start and span[1] <= end:
-                        S.add_node(n, span[0], span[1], attr_dict=attrs)
-                    elif end >= span[0] >= start and span[1] >= end:
-                        S.add_node(n, span[0], end, attr_dict=attrs)
-                    elif span[0] < start and span[1] >= end:
-                        S.add_node(n, start, span[1], attr_dict=attrs)
+        node_ids, owner, lo, hi = self.__node_spans()
+        if end is None:
+            keep = (lo <= start) & (start <= hi)
+            los, his = lo[keep], hi[keep]
+        else:
+            keep = (lo <= end) & (hi >= start)
+            los, his = np.maximum(lo[keep], start), np.minimum(hi[keep], end)
 
-                else:
-                    if span[0] <= start <= span[1]:
-                        if span[0] != span[1]:
-                            S.add_node(n, span[0], span[1], attr_dict=attrs)
+        nodes = [
+            (n, spans, self.get_node_profile(n).get_attributes())
+            for n, spans in self.__group_spans(node_ids, owner[keep], los, his)
+        ]
 
-                        else:
-                            S.add_node(n, span[0], attr_dict=attrs)
+        S = ASH()
+        eid_to_new_eid = dict(zip(old_eids, S.__bulk_load(hyperedges, nodes)))
 
         return S, eid_to_new_eid
 
@@ -994,13 +1409,26 @@ class ASH(object):
         :return: uniformity value for the hypergraph
         """
         nds = self.get_node_set()
-        numerator, denominator = 0, 0
-        for u, v in combinations(nds, 2):
-            for t in self.snapshots:
-                if self.has_node(u, t) and self.has_node(v, t):
-                    numerator += 1
-                if self.has_node(u, t) or self.has_node(v, t):
-                    denominator += 1
+        tids = np.asarray(self.__snapshot_ids(), dtype=np.int64)
+
+        # number of active nodes per snapshot, accumulated from the node spans through a
+        # difference array (no node x snapshot presence matrix is materialised): each
+        # (disjoint) span covers the snapshot indices [first, last)
+        _, _, lo, hi = self.__node_spans()
+        first = np.searchsorted(tids, lo, side="left")
+        last = np.searchsorted(tids, hi, side="right")
+        diff = np.bincount(first, minlength=len(tids) + 1) - np.bincount(
+            last, minlength=len(tids) + 1
+        )
+
+        # per snapshot, pairs with both nodes active (numerator) or at least one (denominator):
+        # a pair has at least one active node unless both are inactive, so the node pairs
+        # are never enumerated
+        active = np.cumsum(diff[:-1])
+        inactive = len(nds) - active
+        pairs = len(nds) * (len(nds) - 1) // 2
+        numerator = int((active * (active - 1) // 2).sum())
+        denominator = int((pairs - inactive * (inactive - 1) // 2).sum())
         return numerator / denominator
 
     def hyperedge_size_distribution(self, start: int = None, end: int = None) -> dict:
@@ -1016,22 +1444,34 @@ class ASH(object):
         :return: A size_to_count dictionary that contains the number of hyperedges with a given size
         """
 
-        dist = defaultdict(int)
+        sizes = self._hyperedge_size
 
         if start is None:
-            for he in self.get_hyperedge_id_set():
-                dist[len(self.get_hyperedge_nodes(he))] += 1
+            return Counter(sizes.values())
 
         elif start is not None and end is None:
-            for he in self.get_hyperedge_id_set(tid=start):
-                dist[len(self.get_hyperedge_nodes(he))] += 1
+            return Counter(sizes[he] for he in self.get_hyperedge_id_set(tid=start))
 
         else:
-            for tid in range(start, end + 1):
-                for he in self.get_hyperedge_id_set(tid=tid):
-                    dist[len(self.get_hyperedge_nodes(he))] += 1
-
-        return dist
+            # number of timesteps of the window in which each hyperedge is alive,
+            # counted from its spans instead of querying the timesteps one by one
+            _, owner, lo, hi = self.__spans()
+            span_sizes = self.__span_sizes()
+            if self.hedge_removal:
+                alive = np.minimum(hi, end) - np.maximum(lo, start) + 1
+            else:
+                # without removal a hyperedge stays alive after its first appearance
+                first = np.flatnonzero(self.__run_starts(owner))
+                alive = end - np.maximum(lo[first], start) + 1
+                span_sizes = span_sizes[first]
+
+            # timesteps summed per size in a single pass
+            keep = alive > 0
+            totals = np.bincount(span_sizes[keep], weights=alive[keep])
+            found = np.flatnonzero(totals)
+            return Counter(
+                dict(zip(found.tolist(), totals[found].astype(np.int64).tolist()))
+            )
 
     def __str__(self) -> str:
         """
@@ -1058,9 +1498,11 @@ class ASH(object):
             e = self.get_hyperedge_attributes(hedge)
             descr["hedges"][hedge] = e
 
+        # same attributes as get_node_profile, without filling the profile cache
+        # with a resolved copy of every node
         for node in self.node_iterator():
-            npr = self.get_node_profile(node)
-            descr["nodes"][node] = npr.get_attributes()
+            attrs = self.__resolve_node_attributes(node)
+            descr["nodes"][node] = {key: copy.copy(v) for key, v in attrs.items()}
         return descr
 
     # Transform
@@ -1076,23 +1518,42 @@ class ASH(object):
         :param end: Specify the end of the interval
         :return: The s-line graph of the ASH
         """
-        node_to_edges = defaultdict(list)
-        for he in self.hyperedge_id_iterator(start=start, end=end):
-            nodes = self.get_hyperedge_nodes(he)
-            for node in nodes:
-                node_to_edges[node].append(he)
+        hyperedges = list(self.hyperedge_id_iterator(start=start, end=end))
+        # a hyperedge with less than s nodes cannot share s nodes with another one:
+        # leaving it out only drops pairs that would be filtered out anyway
+        kept = [he for he in hyperedges if self._hyperedge_size[he] >= s]
+        # dense hyperedge ids, ranked so that id order matches the order of the string ids
+        ranked = sorted(kept)
+        he_index = {he: i for i, he in enumerate(ranked)}
+
+        # nodes are registered even when none of their hyperedges is kept,
+        # so that stars keep their order of appearance
+        node_to_edges = {}
+        for he in hyperedges:
+            idx = he_index.get(he)
+            for node in self._hyperedge_nodes[he]:
+                eds = node_to_edges.setdefault(node, [])
+                if idx is not None:
+                    eds.append(idx)
+
+        # CSR encoding of the node stars
+        lengths = np.fromiter(
+            (len(eds) for eds in node_to_edges.values()),
+            dtype=np.int64,
+            count=len(node_to_edges),
+        )
+        flat = np.fromiter(
+            (he for eds in node_to_edges.values() for he in eds),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        us, ws, counts = self.__pair_counts(lengths, flat, len(ranked), s)
 
         g = nx.Graph()
-        edges = defaultdict(int)
-        for eds in node_to_edges.values():
-            if len(eds) > 0:
-                for e in combinations(eds, 2):
-                    e = sorted(e)
-                    edges[tuple(e)] += 1
-
-        for e, v in edges.items():
-            if v >= s:
-                g.add_edge(e[0], e[1], w=v)
+        g.add_edges_from(
+            (ranked[u], ranked[w], {"w": v})
+            for u, w, v in zip(us.tolist(), ws.tolist(), counts.tolist())
+        )
 
         return g
 
@@ -1111,14 +1572,18 @@ class ASH(object):
         :return: A networkx graph object
         """
 
-        g = nx.Graph()
+        # collect nodes (with their bipartite set) and edges first, then add them in bulk
+        bipartite = {}
+        edges = []
         for he in self.hyperedge_id_iterator(start=start, end=end):
-            g.add_node(he, bipartite=1)
-            nodes = self.get_hyperedge_nodes(he)
-            for node in nodes:
-                if not g.has_node(node):
-                    g.add_node(node, bipartite=0)
-                g.add_edge(node, he)
+            bipartite[he] = 1
+            for node in self._hyperedge_nodes[he]:
+                bipartite.setdefault(node, 0)
+                edges.append((node, he))
+
+        g = nx.Graph()
+        g.add_nodes_from((n, {"bipartite": b}) for n, b in bipartite.items())
+        g.add_edges_from(edges)
 
         return g
 
@@ -1138,14 +1603,22 @@ class ASH(object):
         b = ASH(hedge_removal=True)
         node_to_edges = defaultdict(list)
         for he in self.hyperedge_id_iterator(start=start, end=end):
-            nodes = self.get_hyperedge_nodes(he)
+            nodes = self._hyperedge_nodes[he]
             for node in nodes:
                 node_to_edges[node].append(he)
 
+        # all the dual hyperedges live in 0: add their nodes, in order, at once,
+        # then the hyperedges without validating and invalidating one at a time
+        b.add_nodes(
+            list(dict.fromkeys(he for edges in node_to_edges.values() for he in edges)),
+            0,
+        )
+        b._window_cache.clear()
+        b._span_arrays = None
+
         node_to_eid = {}
         for node, edges in node_to_edges.items():
-            b.add_hyperedge(edges, 0, end=None, **{"name": node})
-            eid = b.get_hyperedge_id(edges)
+            eid = b.__add_hyperedge(edges, frozenset(edges), [0, 0], {"name": node})
             node_to_eid[node] = eid
 
         return b, node_to_eid
@@ -1158,14 +1631,33 @@ class ASH(object):
         :param end:
         :return:
         """
-        count = 0
+        target = set(node_set)
+        if len(target) != len(node_set):
+            # a repeated node can never be matched by the nodes of a hyperedge
+            return 0
+
+        # the hyperedges including all the nodes are the ones shared by their stars:
+        # intersect the stars once instead of testing every hyperedge of the window
+        if not all(self.H.has_node(node) for node in target):
+            return 0
+        node_index, he_index, indptr, indices = self.__stars()
+        # smallest stars first: the running intersection only shrinks
+        rows = sorted(
+            (node_index[node] for node in target),
+            key=lambda i: indptr[i + 1] - indptr[i],
+        )
+        common = None
+        for i in rows:
+            star = indices[indptr[i] : indptr[i + 1]]
+            common = star if common is None else np.intersect1d(common, star)
+            if len(common) == 0:
+                return 0
 
-        for he in self.hyperedge_id_iterator(start=start, end=end):
-            nodes = self.get_hyperedge_nodes(he)
-            inc = set(nodes) & set(node_set)
-            if len(inc) == len(node_set):
-                count += 1
-        return count
+        if start is None:
+            return len(he_index) if common is None else len(common)
+        if common is None:
+            return len(self.__window(start, end)[0])
+        return int(self.__in_window(common, start, end).sum())
 
     def incidence(self, edge_set: set, start: int = None, end: int = None) -> int:
         """
@@ -1176,33 +1668,36 @@ class ASH(object):
         :return:
         """
 
-        first = True
         if end is None:
             end = start
 
-        res = set()
+        # smallest hyperedges first: the presence checks only run on the nodes of the first one,
+        # and the running intersection is as small as possible from the start
+        # (unknown ids, of size 0, come first and raise as usual)
+        edge_set = sorted(edge_set, key=lambda he: self._hyperedge_size.get(he, 0))
+
+        res = None
         for he in edge_set:
-            nodes = self.get_hyperedge_nodes(he)
-            filtered_nodes = []
-            if start is None:
-                for node in nodes:
-                    if self.has_node(node):
-                        filtered_nodes.append(node)
-                filtered_nodes = list(set(filtered_nodes))
-            else:
-                for tid in range(start, end + 1):
-                    for node in nodes:
-                        if self.has_node(node, tid):
-                            filtered_nodes.append(node)
-                    filtered_nodes = list(set(filtered_nodes))
-
-            if first:
-                first = False
-                res = set(filtered_nodes)
+            if res is not None:
+                # the nodes shared so far were already found active: intersect them alone
+                res.intersection_update(self._hyperedge_nodes[he])
+            elif start is None:
+                # the nodes of a hyperedge always belong to the ASH
+                res = set(self.get_hyperedge_nodes(he))
             else:
-                res = set(filtered_nodes) & res
+                # a node is active in the window iff its last span starting
+                # before the window end does not end before the window start
+                res = set()
+                for node in self.get_hyperedge_nodes(he):
+                    spans = self.H.get_node_attribute(node, "t")
+                    pos = bisect_right(spans, [end, float("inf")]) - 1
+                    if pos >= 0 and spans[pos][1] >= start:
+                        res.add(node)
 
-        return len(res)
+            if not res:
+                break
+
+        return 0 if res is None else len(res)
 
     def get_s_incident(
         self, hyperedge_id: str, s: int, start: int = None, end: int = None
@@ -1219,16 +1714,30 @@ class ASH(object):
         :return: the list of s_incident hyperedges
         """
 
-        res = []
-        nodes = set(self.get_hyperedge_nodes(hyperedge_id))
-        for he in self.hyperedge_id_iterator(start=start, end=end):
-            if he != hyperedge_id:
-                he_nodes = set(self.get_hyperedge_nodes(he))
-                incident = len(nodes & he_nodes)
-                if incident >= s:
-                    res.append((he, incident))
+        # number of shared nodes, counted over the stars of the hyperedge nodes
+        # rather than intersecting the node set of every other hyperedge
+        node_index, he_index, indptr, indices = self.__stars()
+        rows = [
+            node_index[node] for node in set(self.get_hyperedge_nodes(hyperedge_id))
+        ]
+        touched = np.concatenate([indices[indptr[i] : indptr[i + 1]] for i in rows])
+        if s > 0:
+            # only the hyperedges sharing some node can qualify: count them alone,
+            # rather than over an array as large as the whole ASH
+            found, common = np.unique(touched, return_counts=True)
+        else:
+            common = np.bincount(touched, minlength=len(he_index))
+            found = np.arange(len(he_index))
 
-        return res
+        keep = (common >= s) & (found != he_index[hyperedge_id])
+        if start is not None:
+            keep &= self.__in_window(found, start, end)
+
+        # the dense ids of the stars follow the hyperedge order of the ASH, as the windows do
+        eids = self.__spans()[0]
+        return list(
+            zip([eids[i] for i in found[keep].tolist()], common[keep].tolist())
+        )
 
     def induced_hypergraph(self, hyperedge_set: list) -> object:
         """
@@ -1243,16 +1752,17 @@ class ASH(object):
         b = ASH()
         nodes_to_add = {}
         old_eid_to_new = {}
+        # membership is tested once per hyperedge: hash it instead of scanning a list
+        hyperedge_set = set(hyperedge_set)
         for he in self.hyperedge_id_iterator():
             if he in hyperedge_set:
-                att = self.get_hyperedge_attributes(he)["t"]
+                att = self.H.get_hyperedge_attribute(he, "t")
                 nodes = self.get_hyperedge_nodes(he)
                 for n in nodes:
                     nodes_to_add[n] = None
 
                 for span in att:
-                    b.add_hyperedge(self.get_hyperedge_nodes(he), span[0], span[1])
-                he1 = b.get_hyperedge_id(nodes)
+                    he1 = b.add_hyperedge(nodes, span[0], span[1])
                 old_eid_to_new[he] = he1
 
         for node in nodes_to_add:
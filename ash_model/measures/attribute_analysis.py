@@ -20,21 +20,101 @@ def __entropy(labels, base=None):
     if n_labels <= 1:
         return 0
 
-    value, counts = np.unique(labels, return_counts=True)
-    probs = counts / n_labels
-    n_classes = np.count_nonzero(probs)
+    # hashing the labels is linear, np.unique would sort them
+    counts = np.fromiter(Counter(labels).values(), dtype=np.int64)
+    n_classes = len(counts)
 
     if n_classes <= 1:
         return 0
 
-    ent = 0.0
-
     # Compute entropy
     base = e if base is None else base
-    for i in probs:
-        ent -= i * log(i, base)
+    probs = counts / n_labels
+    return -(probs * (np.log(probs) / log(base))).sum()
+
+
+def __most_frequent_values(profiles: list, attributes: list) -> dict:
+    """
+    Returns the most frequent value of each attribute over a list of node profiles, with its frequency.
+    All the attributes are counted in a single pass over the profiles. Among equally frequent values,
+    the first one met is returned.
+
+    :param profiles: list of NProfile objects
+    :param attributes: the attribute names
+    :return: an attribute to value-to-frequency dictionary, empty if no profile has the attribute
+    """
+
+    app = {attribute: [] for attribute in attributes}
+    for profile in profiles:
+        values = profile.get_attributes()
+        for attribute, labels in app.items():
+            value = values.get(attribute)
+
+            if isinstance(value, str):
+                labels.append(value)
+
+            elif isinstance(value, dict):
+                labels.extend(value.values())
+
+    res = {}
+    for attribute, labels in app.items():
+        # counting a whole list runs in C, one label at a time it would not
+        count = Counter(labels)
+        if len(count) > 0:
+            value, frequency = count.most_common(1)[0]
+            res[attribute] = {value: frequency}
+        else:
+            res[attribute] = {}
+    return res
+
+
+def __node_profiles(h: ASH, nodes: object, tid: int, cache: dict) -> list:
+    """
+    Returns the profiles of the given nodes in a snapshot, fetching from the ASH only those not in the cache.
+    The cached profiles are shared by the callers and must not be modified.
 
-    return ent
+    :param h: ASH instance
+    :param nodes: the node ids
+    :param tid: Temporal snapshot id
+    :param cache: node id to NProfile dictionary, for the same snapshot, updated in place
+    :return: a list of NProfile objects, one per node
+    """
+
+    profiles = []
+    for node in nodes:
+        if node not in cache:
+            cache[node] = h.get_node_profile(node, tid=tid)
+        profiles.append(cache[node])
+    return profiles
+
+
+def __star_aggregated_profiles(
+    h: ASH, star: set, attributes: list, tid: int, cache: dict
+) -> list:
+    """
+    Builds, for each hyperedge in a star, the profile made of the most frequent value of each attribute.
+    The profile of each node is fetched once, even if the node belongs to several hyperedges of the star.
+
+    :param h: ASH instance
+    :param star: the hyperedge ids of the star
+    :param attributes: the attribute names
+    :param tid: Temporal snapshot id
+    :param cache: node id to NProfile dictionary (see __node_profiles)
+    :return: a list of NProfile objects, one per hyperedge
+    """
+
+    profiles = []
+    for hyperedge_id in star:
+        members = __node_profiles(h, h.get_hyperedge_nodes(hyperedge_id), tid, cache)
+
+        # build aggregated profile
+        p = NProfile(None)
+        for attr, value_ in __most_frequent_values(members, attributes).items():
+            if value_:
+                value = list(value_.keys())[0]
+                p.add_attribute(attr, value)
+        profiles.append(p)
+    return profiles
 
 
 def hyperedge_most_frequent_node_attribute_value(
@@ -54,29 +134,8 @@ def hyperedge_most_frequent_node_attribute_value(
     """
 
     nodes = h.get_hyperedge_nodes(hyperedge_id)
-    app = defaultdict(list)
-    for node in nodes:
-        profile = h.get_node_profile(node, tid=tid)
-
-        if not profile.has_attribute(attribute):
-            continue
-
-        value = profile.get_attribute(attribute)
-
-        if isinstance(value, str):
-            app[attribute].append(value)
-
-        if isinstance(value, dict):
-            vals = [v for v in value.values()]
-            app[attribute].extend(vals)
-
-    count = Counter(app[attribute])
-
-    if len(count) > 0:
-        count = count.most_common(1)[0]
-        res = {count[0]: count[1]}
-        return res
-    return {}
+    profiles = [h.get_node_profile(node, tid=tid) for node in nodes]
+    return __most_frequent_values(profiles, [attribute])[attribute]
 
 
 def hyperedge_aggregate_node_profile(
@@ -104,6 +163,8 @@ def hyperedge_aggregate_node_profile(
                 res[key].append(value)
 
     for key, value in res.items():
+        # a single contiguous buffer shared by the aggregation and the std reduction
+        value = np.asarray(value)
         avg_profile.add_attribute(key, agg_function(value))
         avg_profile.add_statistic(key, "std", np.std(value))
 
@@ -126,12 +187,23 @@ def hyperedge_profile_purity(h: ASH, hyperedge_id: str, tid: int) -> dict:
     frequent value for that attribute in the hyperedge as values
     """
 
+    return __hyperedge_profile_purity(h, hyperedge_id, tid, {})
+
+
+def __hyperedge_profile_purity(
+    h: ASH, hyperedge_id: str, tid: int, cache: dict
+) -> dict:
+    """
+    Computes hyperedge_profile_purity reading the node profiles through a cache (see __node_profiles).
+    """
+
     nodes = h.get_hyperedge_nodes(hyperedge_id)
 
     attributes = set()
 
-    for node in nodes:
-        profile = h.get_node_profile(node, tid)
+    # the same profiles are used for every attribute: fetch them once
+    profiles = __node_profiles(h, nodes, tid, cache)
+    for profile in profiles:
         prof = profile.get_attributes()
         names = prof.keys()
         keys = []
@@ -144,11 +216,7 @@ def hyperedge_profile_purity(h: ASH, hyperedge_id: str, tid: int) -> dict:
         else:
             attributes = attributes & set(keys)
 
-    res = {}
-    for attribute in attributes:
-        res[attribute] = hyperedge_most_frequent_node_attribute_value(
-            h, hyperedge_id, attribute, tid
-        )
+    res = __most_frequent_values(profiles, attributes)
 
     for attr, data in res.items():
         for k, _ in data.items():
@@ -189,9 +257,11 @@ def average_hyperedge_profile_purity(
     else:
         purities = {attribute: [] for attribute in attributes}
 
+    # the hyperedges of a snapshot share their nodes: fetch each profile once
+    cache = {}
     for hyperedge_id in h.get_hyperedge_id_set(tid=tid):
         if len(h.get_hyperedge_nodes(hyperedge_id)) >= min_hyperedge_size:
-            purity = hyperedge_profile_purity(h, hyperedge_id=hyperedge_id, tid=tid)
+            purity = __hyperedge_profile_purity(h, hyperedge_id, tid, cache)
             for attr_name, result in purity.items():
                 label = list(result.keys())[0]
                 pur = list(result.values())[0]
@@ -217,13 +287,21 @@ def hyperedge_profile_entropy(h: ASH, hyperedge_id: str, tid: int) -> dict:
     :return: A dictionary with the entropy of each attribute of the hyperedge's nodes
     """
 
+    return __hyperedge_profile_entropy(h, hyperedge_id, tid, {})
+
+
+def __hyperedge_profile_entropy(
+    h: ASH, hyperedge_id: str, tid: int, cache: dict
+) -> dict:
+    """
+    Computes hyperedge_profile_entropy reading the node profiles through a cache (see __node_profiles).
+    """
+
     nodes = h.get_hyperedge_nodes(hyperedge_id)
 
     attributes = defaultdict(list)
 
-    for node in nodes:
-        profile = h.get_node_profile(node, tid)
-
+    for profile in __node_profiles(h, nodes, tid, cache):
         for name, value in profile.get_attributes().items():
             if isinstance(value, str):
                 attributes[name].append(value)
@@ -246,8 +324,10 @@ def average_hyperedge_profile_entropy(h: ASH, tid: int) -> dict:
     :return: A dictionary mapping each node attribute to the average entropy value
     """
     entropies = defaultdict(list)
+    # the hyperedges of a snapshot share their nodes: fetch each profile once
+    cache = {}
     for hyperedge_id in h.get_hyperedge_id_set(tid=tid):
-        ent = hyperedge_profile_entropy(h, hyperedge_id, tid=tid)
+        ent = __hyperedge_profile_entropy(h, hyperedge_id, tid, cache)
         for attr_name, val in ent.items():
             entropies[attr_name].append(val)
 
@@ -269,29 +349,29 @@ def star_profile_entropy(
     :return: A dictionary with the entropy for each attribute in the star of node_id
     """
 
+    return __star_profile_entropy(h, node_id, tid, method, {})
+
+
+def __star_profile_entropy(
+    h: ASH, node_id: int, tid: int, method: str, cache: dict
+) -> dict:
+    """
+    Computes star_profile_entropy reading the node profiles through a cache (see __node_profiles).
+    """
+
     star = h.get_star(node_id, tid=tid)
 
     if method == "aggregate":
-        attributes = list(h.get_node_profile(node_id, tid).get_attributes().keys())
-
-        profiles = []
-        for hyperedge_id in star:
-            # build aggregated profile
-            p = NProfile(None)
-            for attr in attributes:
-                value_ = hyperedge_most_frequent_node_attribute_value(
-                    h, hyperedge_id, attribute=attr, tid=tid
-                )
-                if value_:
-                    value = list(value_.keys())[0]
-                    p.add_attribute(attr, value)
-            profiles.append(p)
+        attributes = list(
+            __node_profiles(h, [node_id], tid, cache)[0].get_attributes().keys()
+        )
+        profiles = __star_aggregated_profiles(h, star, attributes, tid, cache)
 
     elif method == "collapse":
-        nodes = []
+        nodes = set()
         for hyperedge_id in star:
-            nodes += h.get_hyperedge_nodes(hyperedge_id)
-        profiles = [h.get_node_profile(n, tid) for n in set(nodes)]
+            nodes.update(h.get_hyperedge_nodes(hyperedge_id))
+        profiles = __node_profiles(h, nodes, tid, cache)
 
     else:
         raise ValueError("method must either be 'aggregate' or 'collapse'")
@@ -323,8 +403,10 @@ def average_star_profile_entropy(h, tid, method: str = "aggregate") -> dict:
     :return: A dictionary mapping each node attribute to the average entropy value
     """
     entropies = defaultdict(list)
+    # the stars of a snapshot share their nodes: fetch each profile once
+    cache = {}
     for node_id in h.get_node_set(tid=tid):
-        ent = star_profile_entropy(h, node_id, method=method, tid=tid)
+        ent = __star_profile_entropy(h, node_id, tid, method, cache)
         for attr_name, val in ent.items():
             entropies[attr_name].append(val)
 
@@ -349,29 +431,30 @@ def star_profile_homogeneity(
     :return: A dictionary with the homogeneity of each attribute
     """
 
+    return __star_profile_homogeneity(h, node_id, tid, method, {})
+
+
+def __star_profile_homogeneity(
+    h: ASH, node_id: int, tid: int, method: str, cache: dict
+) -> dict:
+    """
+    Computes star_profile_homogeneity reading the node profiles through a cache (see __node_profiles).
+    """
+
     star = h.get_star(node_id, tid=tid)
 
-    attr_names = list(h.get_node_profile(node_id, tid).get_attributes().keys())
+    node_profile = __node_profiles(h, [node_id], tid, cache)[0]
+    attr_names = list(node_profile.get_attributes().keys())
 
     profiles = []
     if method == "aggregate":
-        for hyperedge_id in star:
-            # build aggregated profile
-            p = NProfile(None)
-            for attr in attr_names:
-                value_ = hyperedge_most_frequent_node_attribute_value(
-                    h, hyperedge_id, attribute=attr, tid=tid
-                )
-                if value_:
-                    value = list(value_.keys())[0]
-                    p.add_attribute(attr, value)
-            profiles.append(p)
+        profiles.extend(__star_aggregated_profiles(h, star, attr_names, tid, cache))
 
     elif method == "collapse":
-        nodes = []
+        nodes = set()
         for hyperedge_id in star:
-            nodes += h.get_hyperedge_nodes(hyperedge_id)
-        profiles.extend([h.get_node_profile(n, tid) for n in set(nodes)])
+            nodes.update(h.get_hyperedge_nodes(hyperedge_id))
+        profiles.extend(__node_profiles(h, nodes, tid, cache))
     else:
         raise ValueError("method must either be 'aggregate' or 'collapse'")
 
@@ -383,7 +466,7 @@ def star_profile_homogeneity(
     res = {}
     # count frequency of node_id's attribute and divide it by star size
     for attr_name in attributes:
-        node_attr = h.get_node_profile(node_id, tid=tid).get_attribute(attr_name)
+        node_attr = node_profile.get_attribute(attr_name)
         res[attr_name] = attributes[attr_name].count(node_attr) / len(star)
 
     return res
@@ -425,9 +508,11 @@ def average_star_profile_homogeneity(
     else:
         homogeneities = {attribute: [] for attribute in attributes}
 
+    # the stars of a snapshot share their nodes: fetch each profile once
+    cache = {}
     for node_id in h.get_node_set(tid=tid):
         if len(h.get_star(node_id, tid=tid)) >= min_star_size:
-            homogeneity = star_profile_homogeneity(h, node_id, method=method, tid=tid)
+            homogeneity = __star_profile_homogeneity(h, node_id, tid, method, cache)
             for attr_name, hom in homogeneity.items():
                 if by_label:
                     label = h.get_node_attribute(node_id, attr_name=attr_name, tid=tid)
@@ -466,8 +551,8 @@ def average_group_degree(h: ASH, tid: int, hyperedge_size: int = None) -> object
     }
 
     for n in h.get_node_set(tid=tid):
+        deg = h.get_degree(n, hyperedge_size=hyperedge_size, tid=tid)
         for attr_name in attributes:
-            deg = h.get_degree(n, hyperedge_size=hyperedge_size, tid=tid)
             attr = h.get_node_attribute(n, attr_name=attr_name, tid=tid)
             group_degrees[attr_name][attr].append(deg)
 
@@ -37,10 +37,11 @@ def temporal_s_dag(
     if start is None:
         start = ids[0]
 
-    if start < min(ids) or start > end or end > max(ids) or start > max(ids):
+    # ids are sorted: the first and last ones bound the network timestamps
+    if start < ids[0] or start > end or end > ids[-1] or start > ids[-1]:
         raise ValueError(
             f"The specified interval {[start, end]} is not a proper subset of the network timestamps "
-            f"{[min(ids), max(ids)]}."
+            f"{[ids[0], ids[-1]]}."
         )
 
     # adjusting temporal window
@@ -214,15 +214,14 @@ def write_ash_to_json(h: ASH, path: str, compress: bool = False) -> None:
     :param compress: whether to use file compression
     :return:
     """
-    js_dmp = json.dumps(h.to_dict(), indent=2)
-
     if compress:
         op = gzip.open
     else:
         op = open
 
+    # the JSON text is streamed to the file, not built as a whole in memory first
     with op(path, "wt") as f:
-        f.write(js_dmp)
+        json.dump(h.to_dict(), f, indent=2)
 
 
 def read_ash_from_json(path: str, compress: bool = False) -> ASH:
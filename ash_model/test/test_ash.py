@@ -1,4 +1,5 @@
 import json
+import pickle
 import unittest
 
 from networkx.algorithms import bipartite
@@ -15,6 +16,33 @@ class ASHTestCase(unittest.TestCase):
         a.add_node(2, start=4, end=10, attr_dict=NProfile(2, name="Giulio"))
         self.assertEqual(a.has_node(2), True)
 
+        # contained, adjacent and overlapping spans are merged
+        a.add_node(3, start=3, end=7)
+        a.add_node(3, start=4, end=4)
+        self.assertEqual(a.get_node_presence(3), [3, 4, 5, 6, 7])
+        a.add_node(3, start=8, end=9)
+        a.add_node(3, start=0, end=1)
+        a.add_node(3, start=1, end=2)
+        self.assertEqual(a.get_node_presence(3), list(range(10)))
+
+        # out of order spans land between the others, bridging them only when touching
+        a.add_node(5, start=0, end=1)
+        a.add_node(5, start=10, end=12)
+        a.add_node(5, start=20, end=20)
+        a.add_node(5, start=5, end=6)
+        self.assertEqual(
+            a.get_node_attribute(5, "t"), {"t": [[0, 1], [5, 6], [10, 12], [20, 20]]}
+        )
+        a.add_node(5, start=7, end=9)
+        a.add_node(5, start=14, end=18)
+        self.assertEqual(
+            a.get_node_attribute(5, "t"), {"t": [[0, 1], [5, 12], [14, 18], [20, 20]]}
+        )
+
+        # a presence attribute in attr_dict does not override start/end
+        a.add_node(4, start=1, end=2, attr_dict={"t": [[5, 6]], "label": "B"})
+        self.assertEqual(a.get_node_presence(4), [1, 2])
+
     def test_add_nodes(self):
         a = ASH(hedge_removal=True)
         a.add_nodes(
@@ -35,6 +63,40 @@ class ASHTestCase(unittest.TestCase):
         self.assertEqual(a.coverage(), 1)
         self.assertEqual(a.node_contribution(1), 1)
 
+        # only the timesteps that are snapshots count, even when they appear out of order
+        b = ASH()
+        b.add_node(1, start=0, end=9)
+        b.add_node(2, start=5)
+        self.assertEqual(b.node_contribution(1), 1)
+        self.assertEqual(b.node_contribution(2), 1 / 3)
+        b.add_node(3, start=3)
+        self.assertEqual(b.node_contribution(1), 1)
+        self.assertEqual(b.node_contribution(2), 1 / 4)
+        self.assertEqual(b.node_contribution(4), 0)
+
+        # the averages follow later snapshots and presence updates
+        self.assertEqual(b.avg_number_of_nodes(), 1.5)
+        b.add_node(2, start=9)
+        self.assertEqual(b.avg_number_of_nodes(), 1.75)
+        self.assertEqual(b.coverage(), 7 / 12)
+
+        # without attributes, for new and already present nodes
+        a.add_nodes([2, 3], start=4)
+        self.assertEqual(a.get_node_presence(2), [0, 1, 2, 4])
+        self.assertEqual(a.get_node_presence(3), [4])
+        self.assertEqual(a.temporal_snapshots_ids(), [0, 2, 4])
+
+        a.add_hyperedges([[3, 4], [4, 5, 6]], 5, 6)
+        self.assertEqual(a.temporal_snapshots_ids(), [0, 2, 4, 5, 6])
+        self.assertEqual(a.get_node_presence(4), [5, 6])
+        self.assertEqual(a.get_node_presence(3), [4])
+        self.assertEqual(a.get_size(6), 2)
+        self.assertEqual(a.avg_number_of_nodes(), 2.4)
+        self.assertEqual(a.coverage(), 0.4)
+        with self.assertRaises(ValueError):
+            a.add_hyperedges([[7, 8]], 3, 2)
+        self.assertEqual(a.has_node(7), False)
+
     def test_degree_dist(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -70,6 +132,22 @@ class ASHTestCase(unittest.TestCase):
         label = a.get_node_attribute(1, attr_name="label", tid=0)
         self.assertEqual(label, "A")
 
+        a.add_node(1, start=5, end=6)
+        self.assertEqual(a.get_node_attribute(1, attr_name="t", tid=6), {"t": [[5, 6]]})
+        self.assertEqual(a.get_node_attribute(1, attr_name="t", tid=3), {"t": []})
+
+        # new and existing attributes updated together, values looking like "t_<tid>"
+        a.add_node(1, start=7, end=8, attr_dict={"role": "part_time", "label": "B"})
+        self.assertEqual(a.get_node_attribute(1, attr_name="label", tid=8), "B")
+        self.assertEqual(a.get_node_attribute(1, attr_name="role", tid=7), "part_time")
+        self.assertEqual(
+            a.get_node_profile(1, tid=8), NProfile(1, label="B", role="part_time")
+        )
+        self.assertEqual(
+            a.get_node_attribute(1, attr_name="label"),
+            {0: "A", 1: "A", 2: "A", 7: "B", 8: "B"},
+        )
+
     def test_node_attributes_to_attribute_values(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -142,6 +220,13 @@ class ASHTestCase(unittest.TestCase):
         attr = a.get_node_profile(1, 3)
         self.assertEqual(attr, NProfile(1, **{"label": "B"}))
 
+        # cached profiles are invalidated on update and not shared with callers
+        attr = a.get_node_profile(1)
+        self.assertEqual(attr.get_attribute("t"), [[0, 4]])
+        attr.get_attribute("label")[0] = "Z"
+        self.assertEqual(a.get_node_attribute(1, attr_name="label", tid=0), "A")
+        self.assertEqual(a.get_node_profile(1).get_attribute("label")[0], "A")
+
     def test_node_set(self):
         a = ASH(hedge_removal=True)
         a.add_node(1, start=0, end=0, attr_dict={"label": "A"})
@@ -156,6 +241,25 @@ class ASHTestCase(unittest.TestCase):
         self.assertEqual(a.get_number_of_nodes(), 3)
         self.assertEqual(a.get_number_of_nodes(0), 1)
 
+        # updates are reflected in later queries
+        a.add_node(1, start=6, end=7)
+        a.add_hyperedge([2, 4], 7)
+        self.assertEqual(a.get_node_set(tid=5), set())
+        self.assertEqual(a.get_node_set(tid=7), {1, 4})
+        self.assertEqual(a.get_number_of_nodes(0), 1)
+
+    def test_uniformity(self):
+        # node 1 has two disjoint spans; snapshots are 0, 1 and 4
+        a = ASH(hedge_removal=True)
+        a.add_node(1, start=0, end=1)
+        a.add_node(1, start=4)
+        a.add_node(2, start=1, end=4)
+        a.add_node(3, start=4)
+
+        # pairs (1, 2), (1, 3), (2, 3): both present in 2 + 1 + 1 snapshots,
+        # at least one in 3 + 3 + 2 snapshots
+        self.assertEqual(a.uniformity(), 0.5)
+
     def test_node_iterator(self):
         a = ASH(hedge_removal=True)
         a.add_node(1, start=0, end=0, attr_dict={"label": "A"})
@@ -257,6 +361,21 @@ class ASHTestCase(unittest.TestCase):
         c, old_to_new = a.hypergraph_temporal_slice(5, 7)
         self.assertIsInstance(c, ASH)
         self.assertEqual(c.get_node_set(), {1, 2, 3, 5})
+        # spans are clipped to the window
+        self.assertEqual(c.get_hyperedge_attribute(old_to_new["e1"], "t"), [[6, 7]])
+        self.assertEqual(c.get_hyperedge_weight(old_to_new["e1"]), 1)
+
+        # a hyperedge active at the start of the window and vanishing within it
+        c, old_to_new = a.hypergraph_temporal_slice(1, 3)
+        self.assertEqual(set(old_to_new), {"e1", "e3"})
+        self.assertEqual(c.get_hyperedge_attribute(old_to_new["e1"], "t"), [[1, 1]])
+        self.assertEqual(c.get_node_presence(1), [1])
+
+        # node attributes are sliced as well
+        a.add_node(4, 3, 4, attr_dict={"label": "x"})
+        c, _ = a.hypergraph_temporal_slice(4, 6)
+        self.assertEqual(c.get_node_attribute(4, "label"), {4: "x"})
+        self.assertEqual(c.get_node_presence(4), [4])
 
     def test_interactions(self):
         a = ASH(hedge_removal=True)
@@ -268,6 +387,67 @@ class ASHTestCase(unittest.TestCase):
         for he in a.stream_interactions():
             self.assertEqual(len(he), 3)
 
+        # a span contained in a previous one does not shrink the hyperedge presence
+        a.add_hyperedge([1, 2, 5], 6, 7)
+        self.assertEqual(a.get_hyperedge_attribute("e2", "t"), [[5, 10]])
+        self.assertEqual(a.has_hyperedge_id("e2", tid=9), True)
+        self.assertEqual(a.get_hyperedge_weight("e2"), 2)
+        self.assertEqual(
+            [x for x in a.stream_interactions() if x[1] == "e2"],
+            [(5, "e2", "+"), (11, "e2", "-")],
+        )
+
+        # point queries on a hyperedge with several disjoint spans
+        a.add_hyperedge([3, 4, 5], 12, 12)
+        a.add_hyperedge([3, 4, 5], 7, 8)
+        for tid, present in [
+            (2, False),
+            (3, True),
+            (5, False),
+            (8, True),
+            (9, False),
+            (12, True),
+            (13, False),
+        ]:
+            self.assertEqual(a.has_hyperedge_id("e3", tid=tid), present)
+        self.assertEqual(a.get_hyperedge_attributes("e3", tid=7)["t"], [[7, 8]])
+        with self.assertRaises(ValueError):
+            a.get_hyperedge_attributes("e3", tid=10)
+        self.assertEqual(a.get_hyperedge_attribute("e3", "t", tid=8), [[7, 8]])
+        self.assertEqual(a.get_hyperedge_attribute("e3", "weight", tid=8), 3)
+        with self.assertRaises(ValueError):
+            a.get_hyperedge_attribute("e3", "t", tid=10)
+
+        self.assertEqual(a.get_hyperedge_id_set(tid=8), {"e1", "e2", "e3"})
+        self.assertEqual(a.get_hyperedge_id_set(tid=11), set())
+        self.assertEqual(a.get_hyperedge_id_set(tid=12), {"e3"})
+        a.add_hyperedge([1, 4], 11, 12)
+        self.assertEqual(a.get_hyperedge_id_set(tid=12), {"e3", "e4"})
+        self.assertEqual(a.get_hyperedge_id_set(hyperedge_size=2, tid=12), {"e4"})
+
+        # callers get a copy of the hyperedge nodes
+        a.get_hyperedge_nodes("e4").append(7)
+        self.assertEqual(a.get_neighbors(4, hyperedge_size=2), {1})
+
+        b = pickle.loads(pickle.dumps(a))
+        self.assertEqual(list(b.stream_interactions()), list(a.stream_interactions()))
+
+        # a span bridging several previous ones collapses them in one pass
+        a.add_hyperedge([3, 4, 5], 4, 11)
+        self.assertEqual(a.get_hyperedge_attribute("e3", "t"), [[3, 12]])
+        self.assertEqual(
+            [x for x in a.stream_interactions() if x[1] == "e3"],
+            [(3, "e3", "+"), (13, "e3", "-")],
+        )
+
+        # the stream is the difference between consecutive snapshots
+        expected = []
+        for tid in range(15):
+            now, before = a.snapshots.get(tid, set()), a.snapshots.get(tid - 1, set())
+            expected += [(tid, he, "+") for he in now - before]
+            expected += [(tid, he, "-") for he in before - now]
+        self.assertEqual(sorted(a.stream_interactions()), sorted(expected))
+
     def test_size_distribution(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -290,6 +470,25 @@ class ASHTestCase(unittest.TestCase):
         self.assertEqual(a.get_s_degree(1, 4), 1)
         self.assertEqual(a.get_s_degree(1, 4, 0), 1)
 
+        # re-adding a hyperedge must not count it twice
+        a.add_hyperedge([1, 2, 3], 1)
+        self.assertEqual(a.get_degree_by_hyperedge_size(1), {3: 3, 4: 1})
+        self.assertEqual(a.get_degree_by_hyperedge_size(1, tid=1), {3: 2})
+        self.assertEqual(a.get_degree(1, hyperedge_size=3, tid=1), 2)
+        self.assertEqual(a.get_degree(1, hyperedge_size=2), 0)
+        self.assertDictEqual(
+            a.hyperedge_size_distribution(start=0, end=1), {2: 1, 3: 4, 4: 3}
+        )
+
+        # without removal, hyperedges are counted at every timestep after their appearance
+        b = ASH(hedge_removal=False)
+        for he in a.hyperedge_id_iterator():
+            start = a.get_hyperedge_attribute(he, "t")[0][0]
+            b.add_hyperedge(a.get_hyperedge_nodes(he), start)
+        self.assertDictEqual(
+            b.hyperedge_size_distribution(start=0, end=3), {2: 4, 3: 11, 4: 10}
+        )
+
     def test_star(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -303,6 +502,37 @@ class ASHTestCase(unittest.TestCase):
         self.assertEqual(a.get_star(1), {"e1", "e3", "e4", "e5"})
         self.assertEqual(a.get_star(1, tid=0), {"e1", "e3", "e4"})
         self.assertEqual(a.get_star(1, tid=0, hyperedge_size=4), {"e4"})
+        self.assertEqual(a.get_star(1, hyperedge_size=3), {"e1", "e3", "e5"})
+        self.assertEqual(a.get_star(1, hyperedge_size=2), set())
+
+        # the returned star is a copy
+        a.get_star(1, hyperedge_size=3).clear()
+        self.assertEqual(a.get_star(1, hyperedge_size=3), {"e1", "e3", "e5"})
+
+        with self.assertRaises(ValueError):
+            a.get_star(100, hyperedge_size=3)
+
+        # snapshot queries are not stale after an update
+        self.assertEqual(a.get_star(1, tid=1), {"e5"})
+        a.add_hyperedge([1, 2, 3], 1)
+        self.assertEqual(a.get_star(1, tid=1), {"e1", "e5"})
+        self.assertEqual(a.has_hyperedge_id("e1", tid=1), True)
+
+    def test_neighbors(self):
+        a = ASH(hedge_removal=True)
+        a.add_hyperedge([1, 2, 3], 0)
+        a.add_hyperedge([1, 3, 4], 1)
+        a.add_hyperedge([1, 5], 1)
+        a.add_hyperedge([2, 5], 2)
+
+        # shared neighbours are counted once, the node itself is left out
+        self.assertEqual(a.get_neighbors(1), {2, 3, 4, 5})
+        self.assertEqual(a.get_neighbors(1, hyperedge_size=3), {2, 3, 4})
+        self.assertEqual(a.get_neighbors(1, hyperedge_size=2), {5})
+        self.assertEqual(a.get_neighbors(1, tid=1), {3, 4, 5})
+        self.assertEqual(a.get_neighbors(1, hyperedge_size=2, tid=0), set())
+        self.assertEqual(a.get_neighbors(1, tid=2), set())
+        self.assertEqual(a.get_number_of_neighbors(5), 2)
 
     def test_str(self):
         a = ASH(hedge_removal=True)
@@ -355,6 +585,13 @@ class ASHTestCase(unittest.TestCase):
 
         self.assertListEqual(res, eds)
 
+        # pairs sharing at least s nodes, with their weights, in order of first appearance
+        g = a.s_line_graph(s=2)
+        self.assertListEqual(
+            list(g.edges(data="w")),
+            [("e1", "e4", 2), ("e1", "e3", 2), ("e3", "e5", 2)],
+        )
+
     def test_bipartite(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -369,6 +606,12 @@ class ASHTestCase(unittest.TestCase):
         g = a.bipartite_projection(start=0, end=0)
         self.assertEqual(bipartite.is_bipartite(g), True)
 
+        g = a.bipartite_projection(start=1, end=1)
+        sides = dict(g.nodes(data="bipartite"))
+        self.assertEqual({n for n, b in sides.items() if b == 1}, {"e4", "e5"})
+        self.assertEqual({n for n, b in sides.items() if b == 0}, {1, 3, 4})
+        self.assertEqual(g.number_of_edges(), 4)
+
     def test_dual(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -394,6 +637,15 @@ class ASHTestCase(unittest.TestCase):
         self.assertEqual(a.incidence(["e1", "e2"]), 1)
         self.assertEqual(a.incidence(["e1", "e3"], start=0, end=0), 2)
 
+        # shared nodes count when present at any point of the window
+        a.add_hyperedge([2, 3, 5], 4)
+        a.add_node(3, start=2, end=3)
+        self.assertEqual(a.incidence(["e1", "e6"]), 2)
+        self.assertEqual(a.incidence(["e1", "e6"], start=1, end=3), 1)
+        self.assertEqual(a.incidence(["e6", "e1"], start=0, end=4), 2)
+        self.assertEqual(a.incidence(["e1", "e6"], start=1, end=1), 0)
+        self.assertEqual(a.incidence(["e1", "e1"], start=0, end=0), 3)
+
     def test_adjacency(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
@@ -404,6 +656,9 @@ class ASHTestCase(unittest.TestCase):
 
         self.assertEqual(a.adjacency([1, 3]), 2)
         self.assertEqual(a.adjacency([1, 3], start=0, end=0), 1)
+        self.assertEqual(a.adjacency([1, 3, 4]), 0)
+        self.assertEqual(a.adjacency([1, 7]), 0)
+        self.assertEqual(a.adjacency([], start=1, end=1), 2)
 
     def test_s_incidente(self):
         a = ASH(hedge_removal=True)
@@ -430,6 +685,16 @@ class ASHTestCase(unittest.TestCase):
 
         self.assertEqual(sorted(list(a.hyperedge_id_iterator(start=3, end=3))), ["e3"])
 
+        # cached windows must reflect later insertions
+        self.assertEqual(a.add_hyperedge([2, 4], 3), "e4")
+        self.assertEqual(
+            sorted(list(a.hyperedge_id_iterator(start=3, end=3))), ["e3", "e4"]
+        )
+        self.assertEqual(a.add_hyperedge([1, 2, 3], 3), "e1")
+        self.assertEqual(
+            sorted(list(a.hyperedge_id_iterator(start=3, end=3))), ["e1", "e3", "e4"]
+        )
+
     def test_hyper_subgraph(self):
         a = ASH(hedge_removal=True)
         a.add_hyperedge([1, 2, 3], 0)
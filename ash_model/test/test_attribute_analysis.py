@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from ash_model.measures import *
 
 
@@ -61,13 +63,36 @@ class AttributeAnalysisCase(unittest.TestCase):
             hyperedge_aggregate_node_profile(a, "e1", 1).get_statistic("age", "std"),
             {"std": 13.442005058770064},
         )
+        self.assertEqual(
+            hyperedge_aggregate_node_profile(
+                a, "e1", 1, agg_function=np.median
+            ).get_attributes(),
+            {"age": 28.5},
+        )
         self.assertEqual(
             hyperedge_most_frequent_node_attribute_value(a, "e1", "party", 1), {"L": 3}
         )
+        # without a tid, the values of all the snapshots are counted
+        self.assertEqual(
+            hyperedge_most_frequent_node_attribute_value(a, "e1", "party", None),
+            {"L": 15},
+        )
+        self.assertEqual(
+            hyperedge_most_frequent_node_attribute_value(a, "e1", "label", 1), {}
+        )
 
     def test_hyperedge_profile_purity(self):
         a = self.get_hypergraph()
 
+        self.assertEqual(
+            hyperedge_profile_purity(a, "e1", 0),
+            {"party": {"L": 1.0}, "gender": {"F": 2 / 3}},
+        )
+        self.assertEqual(
+            hyperedge_profile_purity(a, "e3", 0),
+            {"party": {"L": 0.75}, "gender": {"M": 0.5}},
+        )
+
         for tid in a.temporal_snapshots_ids():
             hes = a.get_hyperedge_id_set(tid=tid)
             for he in hes:
@@ -41,6 +41,16 @@ class UtilsTestCase(unittest.TestCase):
         M = ut.get_incidence_matrix(a, node_to_index, edge_to_index, tid=0)
         self.assertIsInstance(M, dict)
 
+        M = ut.get_incidence_matrix(a, node_to_index, edge_to_index, tid=1)[1]
+        for eid, col in edge_to_index.items():
+            nodes = {
+                n for n, i in node_to_index.items() if M[i, col] != 0
+            }
+            if a.has_hyperedge_id(eid, 1):
+                self.assertEqual(nodes, set(a.get_hyperedge_nodes(eid)))
+            else:
+                self.assertEqual(nodes, set())
+
     def test_get_hyperedge_weight_matrix(self):
         a = self.get_hypergraph()
         _, edge_to_index = ut.get_hyperedge_id_mapping(a)
@@ -40,9 +40,9 @@ def to_graph_decomposition(H: ASH, tid: int = None) -> dict:
 
         edges = [
             (node_a, node_b)
-            for hyperedge_id in H.hyperedge_id_iterator(start=tid)
-            for node_a in H.get_hyperedge_nodes(hyperedge_id)
-            for node_b in H.get_hyperedge_nodes(hyperedge_id)
+            for nodes in map(H.get_hyperedge_nodes, H.hyperedge_id_iterator(start=tid))
+            for node_a in nodes
+            for node_b in nodes
             if node_a != node_b
         ]
 
@@ -80,17 +80,19 @@ def to_networkx_graph(H: ASH, tid: int = None) -> dict:
     for tid in tids:
         G = to_graph_decomposition(H, tid)[tid]
 
+        # nodes and edges are collected first, then added in bulk
         nx_graph = nx.Graph()
+        nx_graph.add_nodes_from(
+            (node, G.get_node_profile(node, tid=tid).get_attributes())
+            for node in G.node_iterator()
+        )
 
-        for node in G.node_iterator():
-            nx_graph.add_node(
-                node, **G.get_node_profile(node, tid=tid).get_attributes()
-            )
-
+        edges = []
         for hyperedge_id in G.hyperedge_id_iterator():
             edge_nodes = G.get_hyperedge_nodes(hyperedge_id)
             edge_attributes = G.get_hyperedge_attributes(hyperedge_id)
-            nx_graph.add_edge(edge_nodes[0], edge_nodes[1], **edge_attributes)
+            edges.append((edge_nodes[0], edge_nodes[1], edge_attributes))
+        nx_graph.add_edges_from(edges)
 
         res[tid] = nx_graph
 
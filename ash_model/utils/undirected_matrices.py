@@ -43,18 +43,17 @@ def get_incidence_matrix(
 
     res = {}
     for tid in tids:
-        h1, old_to_new = h.hypergraph_temporal_slice(tid)
-        s = h1.H
+        # the hyperedges of the temporal slice in tid, under their own ids,
+        # without building the slice
+        active = set(h.hyperedge_id_iterator(start=tid))
 
         rows, cols = [], []
         for hyperedge_id, hyperedge_index in hyperedge_ids_to_indices.items():
-            try:
-                for node in s.get_hyperedge_nodes(hyperedge_id):
+            if hyperedge_id in active:
+                for node in h.get_hyperedge_nodes(hyperedge_id):
                     # get the mapping between the node and its ID
                     rows.append(nodes_to_indices.get(node))
                     cols.append(hyperedge_index)
-            except:
-                pass
 
         values = np.ones(len(rows), dtype=int)
         node_count = len(nodes_to_indices)